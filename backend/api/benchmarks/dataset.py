@@ -0,0 +1,170 @@
+import csv
+import io
+import os
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api.utils.versions import (
+    COLLECTIONS, create_versions, recipe_key, user_key,
+)
+from recipe import (
+    counters, images, popularity, shopping_lists, tag_masks,
+)
+from recipe.models import (
+    Favorite, Ingredients, Recipe, RecipeIngredient, ShoppingCart, Tag
+)
+from user.models import Subscribe
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+BENCHMARK_PASSWORD = 'benchmark-password'
+BENCHMARK_IMAGE = 'recipe/image/benchmark.png'
+
+
+def read_ingredients(path, fallback_amount):
+    """Ингредиенты из csv-каталога или синтетический набор."""
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            return [
+                (name, unit) for name, unit in csv.reader(file) if name
+            ]
+    return [
+        (f'Ингредиент {number}', 'г') for number in range(fallback_amount)
+    ]
+
+
+def seed(recipes=2000, users=100, ingredients_path=None,
+         ingredients_amount=2000, seed_value=0):
+    """Заполнение базы реалистичным набором данных."""
+    rng = random.Random(seed_value)
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), '#E26C2D').save(buffer, 'PNG')
+    default_storage.save(BENCHMARK_IMAGE, ContentFile(buffer.getvalue()))
+    image_width = images.generate(BENCHMARK_IMAGE)
+
+    Tag.objects.bulk_create(
+        Tag(name=name, color=color, slug=slug, bit=bit)
+        for bit, (name, color, slug) in enumerate(DEFAULT_TAGS)
+    )
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    Ingredients.objects.bulk_create(
+        (
+            Ingredients(name=name, measurement_unit=unit)
+            for name, unit in read_ingredients(
+                ingredients_path, ingredients_amount
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    ingredient_ids = list(Ingredients.objects.values_list('id', flat=True))
+
+    password = make_password(BENCHMARK_PASSWORD)
+    User.objects.bulk_create(
+        (
+            User(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                first_name=f'Имя{number}',
+                last_name=f'Фамилия{number}',
+                password=password,
+            )
+            for number in range(users)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    Token.objects.bulk_create(
+        (Token(key=Token.generate_key(), user_id=pk) for pk in user_ids),
+        batch_size=BATCH_SIZE,
+    )
+
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=rng.choice(user_ids),
+                name=f'Рецепт {number}',
+                image=BENCHMARK_IMAGE,
+                image_width=image_width,
+                text=f'Описание рецепта {number}',
+                cooking_time=rng.randint(1, 180),
+            )
+            for number in range(recipes)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    images.change_references({BENCHMARK_IMAGE: len(recipe_ids)})
+
+    RecipeIngredient.objects.bulk_create(
+        (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, min(len(ingredient_ids), rng.randint(3, 10))
+            )
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(tag_ids, rng.randint(1, len(tag_ids)))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    tag_masks.rebuild(recipe_ids)
+
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rng.sample(
+                    recipe_ids, min(len(recipe_ids), 20)
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    Subscribe.objects.bulk_create(
+        (
+            Subscribe(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(user_ids, min(len(user_ids), 11))
+            if author_id != user_id
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    shopping_lists.rebuild(user_ids)
+    counters.reconcile_recipes(recipe_ids)
+    counters.reconcile_users(user_ids)
+    popularity.recompute(recipe_ids)
+    create_versions(
+        list(COLLECTIONS)
+        + [recipe_key(pk) for pk in recipe_ids]
+        + [user_key(pk) for pk in user_ids]
+    )
+    return {
+        'recipes': len(recipe_ids),
+        'users': len(user_ids),
+        'ingredients': len(ingredient_ids),
+        'tags': len(tag_ids),
+    }
@@ -0,0 +1,222 @@
+import base64
+import io
+import json
+from collections import namedtuple
+
+from PIL import Image
+
+from api.benchmarks.dataset import BENCHMARK_IMAGE
+
+Endpoint = namedtuple(
+    'Endpoint',
+    (
+        'name', 'method', 'path', 'data', 'status', 'anonymous', 'save_as',
+        'headers',
+    ),
+    defaults=(None, 200, False, None, None),
+)
+IMPORT_ROWS = 50
+
+
+def image_data():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), '#E26C2D').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def recipe_data(ctx):
+    return {
+        'name': 'Рецепт для замера',
+        'text': 'Описание рецепта для замера',
+        'cooking_time': 15,
+        'image': ctx['image'],
+        'tags': ctx['tags'][:2],
+        'ingredients': [
+            {'id': pk, 'amount': 10} for pk in ctx['ingredients'][:5]
+        ],
+    }
+
+
+def recipe_patch(ctx):
+    data = recipe_data(ctx)
+    data['text'] = 'Обновлённое описание'
+    data['ingredients'] = [
+        {'id': pk, 'amount': 20} for pk in ctx['ingredients'][2:7]
+    ]
+    return data
+
+
+def recipe_import_data(ctx):
+    rows = [
+        dict(
+            recipe_data(ctx),
+            name=f'Импорт {number}',
+            image=BENCHMARK_IMAGE,
+            tags=ctx['tag_slugs'][:2],
+        )
+        for number in range(IMPORT_ROWS)
+    ]
+    rows.append(dict(recipe_data(ctx), tags=['unknown']))
+    return '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows)
+
+
+def new_user(ctx):
+    return {
+        'email': f'bench{ctx["round"]}@example.com',
+        'username': f'bench{ctx["round"]}',
+        'first_name': 'Бенч',
+        'last_name': 'Марк',
+        'password': 'benchmark-password',
+    }
+
+
+ENDPOINTS = (
+    Endpoint('recipes-list', 'get', lambda ctx: '/api/recipes/'),
+    Endpoint(
+        'recipes-list-not-modified', 'get', lambda ctx: '/api/recipes/',
+        status=304, headers=lambda ctx: {'HTTP_IF_NONE_MATCH': ctx['etag']},
+    ),
+    Endpoint(
+        'recipes-list-anonymous', 'get', lambda ctx: '/api/recipes/',
+        anonymous=True,
+    ),
+    Endpoint(
+        'recipes-list-large', 'get', lambda ctx: '/api/recipes/?limit=50',
+    ),
+    Endpoint(
+        'recipes-list-deep', 'get', lambda ctx: '/api/recipes/?page=200',
+    ),
+    Endpoint(
+        'recipes-list-cursor', 'get',
+        lambda ctx: '/api/recipes/?pagination=cursor',
+    ),
+    Endpoint(
+        'recipes-list-filtered', 'get',
+        lambda ctx: (
+            f'/api/recipes/?tags={ctx["tag_slugs"][0]}'
+            f'&tags={ctx["tag_slugs"][1]}&is_favorited=1'
+        ),
+    ),
+    Endpoint(
+        'recipes-list-popular', 'get',
+        lambda ctx: '/api/recipes/?ordering=popular',
+    ),
+    Endpoint(
+        'recipes-list-popular-cursor', 'get',
+        lambda ctx: (
+            f'/api/recipes/?ordering=popular&pagination=cursor'
+            f'&tags={ctx["tag_slugs"][0]}'
+        ),
+    ),
+    Endpoint(
+        'recipes-search', 'get',
+        lambda ctx: '/api/recipes/?search=описание рецепта 15',
+    ),
+    Endpoint(
+        'recipes-list-author', 'get',
+        lambda ctx: f'/api/recipes/?author={ctx["author"]}',
+    ),
+    Endpoint(
+        'recipes-match', 'get',
+        lambda ctx: '/api/recipes/match/?' + '&'.join(
+            f'ingredients={pk}' for pk in ctx['ingredients'][:10]
+        ),
+    ),
+    Endpoint(
+        'recipes-detail', 'get', lambda ctx: f'/api/recipes/{ctx["recipe"]}/',
+    ),
+    Endpoint(
+        'recipes-detail-not-modified', 'get',
+        lambda ctx: f'/api/recipes/{ctx["recipe"]}/', status=304,
+        headers=lambda ctx: {'HTTP_IF_NONE_MATCH': ctx['etag']},
+    ),
+    Endpoint(
+        'recipes-create', 'post', lambda ctx: '/api/recipes/',
+        data=recipe_data, status=201, save_as='created',
+    ),
+    Endpoint(
+        'recipes-update', 'patch',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/', data=recipe_patch,
+    ),
+    Endpoint(
+        'recipes-import', 'post', lambda ctx: '/api/recipes/import/',
+        data=recipe_import_data,
+        headers=lambda ctx: {'content_type': 'application/x-ndjson'},
+    ),
+    Endpoint(
+        'recipes-favorite', 'post',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/favorite/', status=201,
+    ),
+    Endpoint(
+        'recipes-favorite-delete', 'delete',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/favorite/', status=204,
+    ),
+    Endpoint(
+        'recipes-shopping-cart', 'post',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/shopping_cart/',
+        status=201,
+    ),
+    Endpoint(
+        'recipes-download-shopping-cart', 'get',
+        lambda ctx: '/api/recipes/download_shopping_cart/',
+    ),
+    Endpoint(
+        'recipes-download-shopping-cart-csv', 'get',
+        lambda ctx: '/api/recipes/download_shopping_cart/?format=csv',
+    ),
+    Endpoint(
+        'recipes-download-shopping-cart-json', 'get',
+        lambda ctx: '/api/recipes/download_shopping_cart/?format=json',
+    ),
+    Endpoint(
+        'recipes-shopping-cart-delete', 'delete',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/shopping_cart/',
+        status=204,
+    ),
+    Endpoint(
+        'recipes-delete', 'delete',
+        lambda ctx: f'/api/recipes/{ctx["created"]}/', status=204,
+    ),
+    Endpoint('ingredients-list', 'get', lambda ctx: '/api/ingredients/'),
+    Endpoint(
+        'ingredients-search', 'get',
+        lambda ctx: f'/api/ingredients/?name={ctx["ingredient_prefix"]}',
+    ),
+    Endpoint(
+        'ingredients-detail', 'get',
+        lambda ctx: f'/api/ingredients/{ctx["ingredients"][0]}/',
+    ),
+    Endpoint('tags-list', 'get', lambda ctx: '/api/tags/'),
+    Endpoint(
+        'tags-detail', 'get', lambda ctx: f'/api/tags/{ctx["tags"][0]}/',
+    ),
+    Endpoint('users-list', 'get', lambda ctx: '/api/users/'),
+    Endpoint(
+        'users-create', 'post', lambda ctx: '/api/users/', data=new_user,
+        status=201, anonymous=True,
+    ),
+    Endpoint(
+        'users-detail', 'get', lambda ctx: f'/api/users/{ctx["author"]}/',
+    ),
+    Endpoint('users-me', 'get', lambda ctx: '/api/users/me/'),
+    Endpoint(
+        'users-subscriptions', 'get', lambda ctx: '/api/users/subscriptions/',
+    ),
+    Endpoint(
+        'users-subscriptions-limited', 'get',
+        lambda ctx: '/api/users/subscriptions/?recipes_limit=3&limit=10',
+    ),
+    Endpoint(
+        'users-subscriptions-cursor', 'get',
+        lambda ctx: '/api/users/subscriptions/?pagination=cursor',
+    ),
+    Endpoint(
+        'users-subscribe', 'post',
+        lambda ctx: f'/api/users/{ctx["stranger"]}/subscribe/', status=201,
+    ),
+    Endpoint(
+        'users-unsubscribe', 'delete',
+        lambda ctx: f'/api/users/{ctx["stranger"]}/subscribe/', status=204,
+    ),
+)
@@ -0,0 +1,26 @@
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment,
+)
+
+
+@contextmanager
+def benchmark_environment(keepdb=False):
+    """Тестовая база и временный MEDIA_ROOT на время замеров."""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb,
+    )
+    try:
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                yield
+    finally:
+        connection.creation.destroy_test_db(
+            old_name, verbosity=0, keepdb=keepdb,
+        )
+        teardown_test_environment()
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.benchmarks.endpoints import image_data
+from recipe.models import Ingredients, Recipe, Tag
+
+User = get_user_model()
+
+
+def prepare():
+    """Контекст и клиенты для прохода по ENDPOINTS после dataset.seed."""
+    viewer = User.objects.order_by('id').first()
+    following = viewer.follower.values_list('author_id', flat=True)
+    ingredient = Ingredients.objects.order_by('id').first()
+    ctx = {
+        'image': image_data(),
+        'tags': list(Tag.objects.values_list('id', flat=True)),
+        'tag_slugs': list(Tag.objects.values_list('slug', flat=True)),
+        'ingredients': list(
+            Ingredients.objects.order_by('id').values_list(
+                'id', flat=True
+            )[:10]
+        ),
+        'ingredient_prefix': ingredient.name[:2],
+        'recipe': Recipe.objects.order_by('id').first().id,
+        'author': Recipe.objects.order_by('id').first().author_id,
+        'stranger': User.objects.exclude(
+            id__in=list(following) + [viewer.id]
+        ).first().id,
+        'round': 0,
+    }
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=viewer).key}'
+    )
+    return ctx, client, APIClient()
+
+
+def request(client, endpoint, ctx):
+    """Запрос к эндпоинту; потоковый ответ читается целиком."""
+    data = endpoint.data(ctx) if endpoint.data else None
+    headers = endpoint.headers(ctx) if endpoint.headers else {}
+    if 'content_type' not in headers:
+        headers['format'] = 'json'
+    response = getattr(client, endpoint.method)(
+        endpoint.path(ctx), data, **headers
+    )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def check(endpoint, response, ctx):
+    """Проверка статуса и сохранение ETag и id для следующих запросов."""
+    if response.status_code != endpoint.status:
+        raise CommandError(
+            f'{endpoint.name}: ожидался статус {endpoint.status}, '
+            f'получен {response.status_code}: {response.content[:200]}'
+        )
+    ctx['etag'] = response.get('ETag')
+    if endpoint.save_as:
+        ctx[endpoint.save_as] = response.json()['id']
@@ -0,0 +1,134 @@
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmarks import dataset, replay
+from api.benchmarks.endpoints import ENDPOINTS
+from api.benchmarks.environment import benchmark_environment
+from api.utils.recipe_cache import recipe_cache
+
+BUDGETS_PATH = Path(dataset.__file__).resolve().parent / 'budgets.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер количества запросов к БД и времени ответа для каждого '
+        'эндпоинта API на тестовой базе с реалистичным набором данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--ingredients-file', default='data/ingredients.csv',
+            help='Каталог ингредиентов; без файла создаётся синтетический.',
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--report', default='benchmark_report.json')
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH))
+        parser.add_argument(
+            '--update-budgets', action='store_true',
+            help='Записать измеренные значения как новые бюджеты.',
+        )
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        with benchmark_environment(keepdb=options['keepdb']):
+            results, data = self.run_benchmark(options)
+
+        budgets_path = Path(options['budgets'])
+        budgets = {}
+        if budgets_path.exists():
+            budgets = json.loads(budgets_path.read_text())
+        if options['update_budgets']:
+            budgets = {item['name']: item['queries'] for item in results}
+            budgets_path.write_text(
+                json.dumps(budgets, indent=2, sort_keys=True) + '\n'
+            )
+
+        failures = []
+        for item in results:
+            item['budget'] = budgets.get(item['name'])
+            over = item['budget'] is not None and (
+                item['queries'] > item['budget']
+            )
+            if over:
+                failures.append(item['name'])
+            self.stdout.write(
+                f'{item["name"]:<38} {item["queries"]:>4} '
+                f'/ {item["budget"] if item["budget"] is not None else "-":>4}'
+                f' запросов {item["time_ms"]["median"]:>9.2f} мс'
+                + (' ПРЕВЫШЕН' if over else '')
+            )
+
+        report = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'django': django.get_version(),
+            'vendor': connection.vendor,
+            'dataset': data,
+            'repeat': options['repeat'],
+            'recipe_cache': recipe_cache.stats(),
+            'endpoints': results,
+        }
+        Path(options['report']).write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + '\n'
+        )
+        if failures:
+            raise CommandError(
+                'Превышен бюджет запросов: ' + ', '.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Бюджеты соблюдены, отчёт: {options["report"]}'
+        ))
+
+    def run_benchmark(self, options):
+        data = dataset.seed(
+            recipes=options['recipes'],
+            users=options['users'],
+            ingredients_path=options['ingredients_file'],
+        )
+        ctx, client, anonymous = replay.prepare()
+
+        measures = {endpoint.name: [] for endpoint in ENDPOINTS}
+        for number in range(options['repeat']):
+            ctx['round'] = number
+            for endpoint in ENDPOINTS:
+                measures[endpoint.name].append(
+                    self.measure(
+                        anonymous if endpoint.anonymous else client,
+                        endpoint, ctx,
+                    )
+                )
+
+        results = []
+        for endpoint in ENDPOINTS:
+            queries = [measure[0] for measure in measures[endpoint.name]]
+            timings = [measure[1] for measure in measures[endpoint.name]]
+            results.append({
+                'name': endpoint.name,
+                'method': endpoint.method.upper(),
+                'path': endpoint.path(ctx),
+                'queries': max(queries),
+                'queries_min': min(queries),
+                'time_ms': {
+                    'min': round(min(timings), 3),
+                    'median': round(statistics.median(timings), 3),
+                    'max': round(max(timings), 3),
+                },
+            })
+        return results, data
+
+    def measure(self, client, endpoint, ctx):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = replay.request(client, endpoint, ctx)
+            elapsed = (time.perf_counter() - start) * 1000
+        replay.check(endpoint, response, ctx)
+        return len(queries.captured_queries), elapsed
@@ -0,0 +1,118 @@
+import base64
+import io
+import json
+import statistics
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api.benchmarks.environment import benchmark_environment
+from recipe.models import Ingredients, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пиковое потребление памяти при создании рецепта с изображением: '
+        'base64 в JSON против потоковой multipart-загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=3000)
+        parser.add_argument('--height', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        image = self.make_image(options['width'], options['height'])
+        with benchmark_environment(keepdb=options['keepdb']):
+            client, data = self.prepare()
+            bodies = {
+                'json': (
+                    json.dumps(dict(
+                        data,
+                        ingredients=json.loads(data['ingredients']),
+                        image='data:image/jpeg;base64,'
+                        + base64.b64encode(image).decode(),
+                    )).encode(),
+                    'application/json',
+                ),
+                'multipart': (
+                    encode_multipart(BOUNDARY, dict(
+                        data,
+                        image=SimpleUploadedFile(
+                            'benchmark.jpg', image, 'image/jpeg'
+                        ),
+                    )),
+                    MULTIPART_CONTENT,
+                ),
+            }
+            peaks = {
+                name: [
+                    self.measure(client, body, content_type)
+                    for _ in range(options['repeat'])
+                ]
+                for name, (body, content_type) in bodies.items()
+            }
+        self.stdout.write(f'Изображение: {len(image) / 2 ** 20:.2f} МБ')
+        for name, values in peaks.items():
+            peak = statistics.median(values)
+            self.stdout.write(
+                f'{name:<10} пик {peak / 2 ** 20:8.2f} МБ, '
+                f'{peak / len(image):5.2f} размера изображения'
+            )
+
+    @staticmethod
+    def make_image(width, height):
+        buffer = io.BytesIO()
+        Image.effect_noise((width, height), 64).convert('RGB').save(
+            buffer, 'JPEG', quality=95,
+        )
+        return buffer.getvalue()
+
+    @staticmethod
+    def prepare():
+        user = User.objects.create_user(
+            username='uploader', email='uploader@example.com',
+            password='benchmark-password',
+        )
+        tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast',
+        )
+        ingredient = Ingredients.objects.create(
+            name='Мука', measurement_unit='г',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        data = {
+            'name': 'Рецепт для замера',
+            'text': 'Описание рецепта для замера',
+            'cooking_time': 15,
+            'tags': [tag.id],
+            'ingredients': json.dumps([{'id': ingredient.id, 'amount': 10}]),
+        }
+        return client, data
+
+    @staticmethod
+    def measure(client, body, content_type):
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            response = client.generic(
+                'POST', '/api/recipes/', body, content_type=content_type,
+            )
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+        if response.status_code != 201:
+            raise CommandError(
+                f'Ожидался статус 201, получен {response.status_code}: '
+                f'{response.content[:200]}'
+            )
+        return peak
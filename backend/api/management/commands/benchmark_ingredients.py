@@ -0,0 +1,84 @@
+import os
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.dataset import read_ingredients
+from api.benchmarks.environment import benchmark_environment
+from api.recipes.serializers import IngredientsSerializer
+from api.utils.filters import IngredientFilter
+from api.utils.ingredient_index import IngredientIndex, catalog_version
+from recipe.models import Ingredients
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение автодополнения ингредиентов через ORM (istartswith) '
+        'и через префиксный индекс в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='data/ingredients.csv')
+        parser.add_argument('--prefixes', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            self.stdout.write(self.style.WARNING(
+                f'{options["path"]} не найден, '
+                f'используется синтетический каталог.'
+            ))
+        catalog = read_ingredients(options['path'], 2000)
+        rng = random.Random(options['seed'])
+        prefixes = []
+        for _ in range(options['prefixes']):
+            name, _ = rng.choice(catalog)
+            prefixes.append(name[:rng.randint(1, min(len(name), 4))])
+
+        with benchmark_environment():
+            Ingredients.objects.bulk_create(
+                (
+                    Ingredients(name=name, measurement_unit=unit)
+                    for name, unit in catalog
+                ),
+                batch_size=1000,
+            )
+            orm = self.measure(prefixes, self.orm_search, options['limit'])
+            index = IngredientIndex(ttl=float('inf'))
+            start = time.perf_counter()
+            index.load(catalog_version())
+            load_ms = (time.perf_counter() - start) * 1000
+            memory = self.measure(prefixes, index.search, options['limit'])
+
+        self.stdout.write(f'Ингредиентов в каталоге: {len(catalog)}')
+        self.stdout.write(f'Построение индекса: {load_ms:.2f} мс')
+        for title, timings in (('ORM', orm), ('Индекс', memory)):
+            self.stdout.write(
+                f'{title:<8} медиана {statistics.median(timings):.3f} мс, '
+                f'максимум {max(timings):.3f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение по медиане: '
+            f'{statistics.median(orm) / statistics.median(memory):.1f}x'
+        ))
+
+    @staticmethod
+    def orm_search(prefix, limit=None):
+        queryset = IngredientFilter(
+            {'name': prefix}, queryset=Ingredients.objects.all()
+        ).qs
+        if limit is not None:
+            queryset = queryset[:limit]
+        return IngredientsSerializer(queryset, many=True).data
+
+    @staticmethod
+    def measure(prefixes, search, limit):
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            search(prefix, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.benchmarks import dataset
+from api.benchmarks.endpoints import image_data
+from api.benchmarks.environment import benchmark_environment
+from recipe.models import Ingredients, Tag
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Стоимость создания рецепта в запросах и времени в зависимости '
+        'от количества ингредиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1, 5, 10, 30, 60],
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_environment():
+            dataset.seed(
+                recipes=0, users=1,
+                ingredients_amount=max(options['sizes']),
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Token {Token.objects.get().key}'
+            )
+            ingredient_ids = list(
+                Ingredients.objects.values_list('id', flat=True)
+            )
+            tag_ids = list(Tag.objects.values_list('id', flat=True))
+            image = image_data()
+            for size in options['sizes']:
+                data = {
+                    'name': f'Рецепт из {size} ингредиентов',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'image': image,
+                    'tags': tag_ids,
+                    'ingredients': [
+                        {'id': pk, 'amount': 1}
+                        for pk in ingredient_ids[:size]
+                    ],
+                }
+                queries, timings = [], []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        response = client.post(
+                            '/api/recipes/', data, format='json'
+                        )
+                        timings.append(
+                            (time.perf_counter() - start) * 1000
+                        )
+                    assert response.status_code == 201, response.content
+                    queries.append(len(captured.captured_queries))
+                self.stdout.write(
+                    f'{size:>4} ингредиентов: {max(queries):>4} запросов, '
+                    f'медиана {statistics.median(timings):.2f} мс'
+                )
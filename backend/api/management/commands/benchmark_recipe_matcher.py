@@ -0,0 +1,145 @@
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from api.benchmarks.environment import benchmark_environment
+from api.utils.recipe_matcher import RecipeMatcher
+from recipe.models import Ingredients, Recipe, RecipeIngredient
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Подбор рецептов по имеющимся ингредиентам на синтетическом '
+        'каталоге: агрегация в БД против обратного индекса в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients', type=int, default=2000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--pantry', type=int, default=10)
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with benchmark_environment():
+            ingredient_ids, weights = self.seed(rng, options)
+            pantries = [
+                set(rng.choices(ingredient_ids, weights, k=options['pantry']))
+                for _ in range(options['queries'])
+            ]
+            limit = options['limit']
+            orm = self.measure(pantries, self.orm_match, limit)
+
+            matcher = RecipeMatcher(
+                ttl=float('inf'), sync_interval=float('inf'),
+            )
+            tracemalloc.start()
+            start = time.perf_counter()
+            matcher.load()
+            load_ms = (time.perf_counter() - start) * 1000
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            index = self.measure(pantries, matcher.match, limit)
+
+        self.stdout.write(
+            f'Рецептов: {options["recipes"]}, '
+            f'ингредиентов: {options["ingredients"]}, '
+            f'продуктов в запросе: до {options["pantry"]}'
+        )
+        self.stdout.write(
+            f'Построение индекса: {load_ms:.0f} мс, '
+            f'{memory / 2 ** 20:.1f} МБ'
+        )
+        for title, timings in (('ORM', orm), ('Индекс', index)):
+            self.stdout.write(
+                f'{title:<8} медиана {statistics.median(timings):.2f} мс, '
+                f'максимум {max(timings):.2f} мс'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение по медиане: '
+            f'{statistics.median(orm) / statistics.median(index):.1f}x'
+        ))
+
+    @staticmethod
+    def seed(rng, options):
+        """Каталог, где частота ингредиентов убывает как 1 / ранг."""
+        author = User.objects.create_user(
+            username='matcher', email='matcher@example.com',
+            password='benchmark-password',
+        )
+        Ingredients.objects.bulk_create(
+            (
+                Ingredients(name=f'Ингредиент {number}', measurement_unit='г')
+                for number in range(options['ingredients'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        ingredient_ids = list(
+            Ingredients.objects.order_by('id').values_list('id', flat=True)
+        )
+        weights = [1 / rank for rank in range(1, len(ingredient_ids) + 1)]
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author=author, name=f'Рецепт {number}',
+                    image='recipe/image/benchmark.png',
+                    text='Описание', cooking_time=30,
+                )
+                for number in range(options['recipes'])
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id, ingredient_id=ingredient_id,
+                    amount=100,
+                )
+                for recipe_id in Recipe.objects.values_list('id', flat=True)
+                for ingredient_id in set(
+                    rng.choices(ingredient_ids, weights, k=rng.randint(3, 12))
+                )
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return ingredient_ids, weights
+
+    @staticmethod
+    def orm_match(ingredient_ids, limit):
+        return list(
+            RecipeIngredient.objects.values('recipe_id')
+            .annotate(
+                matched=Count(
+                    'id', filter=Q(ingredient_id__in=ingredient_ids),
+                ),
+                total=Count('id'),
+            )
+            .filter(matched__gt=0)
+            .annotate(
+                coverage=Cast('matched', FloatField())
+                / Cast('total', FloatField()),
+                missing=F('total') - F('matched'),
+            )
+            .order_by('-coverage', 'missing', '-recipe_id')[:limit]
+        )
+
+    @staticmethod
+    def measure(pantries, match, limit):
+        timings = []
+        for pantry in pantries:
+            start = time.perf_counter()
+            match(pantry, limit)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,152 @@
+import json
+import re
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.benchmarks import dataset, replay
+from api.benchmarks.endpoints import ENDPOINTS
+from api.benchmarks.environment import benchmark_environment
+
+SQLITE_TABLE = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: ([A-Z]\d+))?')
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+SQLITE_PK_ORDER = re.compile(r'ORDER BY "?(\w+)"?\."id" .*LIMIT')
+SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+SQL_PREVIEW_LENGTH = 160
+
+
+class Command(BaseCommand):
+    help = (
+        'Проход по эндпоинтам API на тестовой базе с EXPLAIN для каждого '
+        'запроса на чтение: находит последовательное чтение таблиц, '
+        'в которых не меньше --min-rows строк.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--ingredients-file', default='data/ingredients.csv',
+            help='Каталог ингредиентов; без файла создаётся синтетический.',
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Порог размера таблицы для полного чтения.',
+        )
+        parser.add_argument('--report', help='Сохранить находки в JSON.')
+        parser.add_argument('--keepdb', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(
+                f'EXPLAIN не поддерживается для {connection.vendor}.'
+            )
+        with benchmark_environment(keepdb=options['keepdb']):
+            data = dataset.seed(
+                recipes=options['recipes'],
+                users=options['users'],
+                ingredients_path=options['ingredients_file'],
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            scans = self.audit(options['min_rows'])
+
+        for scan in scans:
+            self.stdout.write(
+                f'{scan["endpoint"]:<38} {scan["table"]:<28} '
+                f'{scan["rows"]:>8} строк\n    {scan["sql"]}'
+            )
+        if options['report']:
+            Path(options['report']).write_text(json.dumps(
+                {
+                    'vendor': connection.vendor,
+                    'dataset': data,
+                    'min_rows': options['min_rows'],
+                    'scans': scans,
+                },
+                indent=2, ensure_ascii=False,
+            ) + '\n')
+        if scans:
+            raise CommandError(
+                f'Последовательное чтение больших таблиц: {len(scans)}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Последовательного чтения больших таблиц не найдено.'
+        ))
+
+    def audit(self, min_rows):
+        ctx, client, anonymous = replay.prepare()
+        sizes = {}
+        scans = []
+        for endpoint in ENDPOINTS:
+            with CaptureQueriesContext(connection) as queries:
+                response = replay.request(
+                    anonymous if endpoint.anonymous else client,
+                    endpoint, ctx,
+                )
+            replay.check(endpoint, response, ctx)
+            statements = dict.fromkeys(
+                query['sql'] for query in queries.captured_queries
+                if query['sql'].lstrip().upper().startswith(
+                    ('SELECT', 'WITH')
+                )
+            )
+            for sql in statements:
+                for table in dict.fromkeys(self.sequential_scans(sql)):
+                    if table not in sizes:
+                        sizes[table] = self.count_rows(table)
+                    if sizes[table] >= min_rows:
+                        scans.append({
+                            'endpoint': endpoint.name,
+                            'table': table,
+                            'rows': sizes[table],
+                            'sql': sql[:SQL_PREVIEW_LENGTH],
+                        })
+        return scans
+
+    @staticmethod
+    def sequential_scans(sql):
+        """Таблицы, которые план запроса читает целиком.
+
+        В PostgreSQL это узлы Seq Scan. SQLite отмечает полное чтение
+        строкой «SCAN <таблица или псевдоним>» без индекса; псевдонимы
+        подзапросов Django (U0, T3) сопоставляются с таблицами по SQL.
+        Так же SQLite показывает обход по первичному ключу с LIMIT, для
+        которого PostgreSQL строит Index Scan, поэтому такой обход без
+        сортировки во временном дереве не учитывается.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                nodes = [cursor.fetchone()[0][0]['Plan']]
+                tables = []
+                while nodes:
+                    node = nodes.pop()
+                    nodes.extend(node.get('Plans', ()))
+                    if node['Node Type'] == 'Seq Scan':
+                        tables.append(node['Relation Name'])
+                return tables
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+        aliases = {
+            alias or table: table
+            for table, alias in SQLITE_TABLE.findall(sql)
+        }
+        ordered = SQLITE_PK_ORDER.search(sql)
+        if ordered and SQLITE_SORT not in details:
+            aliases.pop(ordered[1], None)
+        return [
+            aliases[match[1]]
+            for match in map(SQLITE_SCAN.match, details)
+            if match and match[1] in aliases
+        ]
+
+    @staticmethod
+    def count_rows(table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            return cursor.fetchone()[0]
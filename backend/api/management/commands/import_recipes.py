@@ -0,0 +1,43 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.recipe_import import RecipeImporter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пакетный импорт рецептов из NDJSON-файла.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--author', default=None,
+            help='Email автора для строк без поля author.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--report', default=None,
+            help='Файл для JSON-отчёта об ошибках.',
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(email=options['author']).first()
+            if author is None:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        importer = RecipeImporter(author, options['batch_size'])
+        with open(options['path'], encoding='utf-8') as file:
+            report = importer.run(file)
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано рецептов: {report["created"]}, '
+            f'строк с ошибками: {len(report["errors"])}'
+        ))
@@ -1,11 +1,21 @@
+import json
+
+from django.db import transaction
+from django.db.models import Manager
 from django.forms import ValidationError
+from django.http import QueryDict
 
 from rest_framework import serializers
 
 from foodgram.constants import MAX_VALUE, MIN_VALUE
 from api.users.serializers import UserGetSerializer
-from api.utils.check_functions import add_ingredients, check_recipe
-from api.utils.fields import Base64ImageField
+from api.utils.check_functions import (
+    add_ingredients, check_recipe, check_subscribe, update_ingredients
+)
+from api.utils.fields import Base64ImageField, ImageSizesField
+from api.utils.recipe_cache import recipe_cache
+from api.utils.viewer import get_viewer
+from recipe import shopping_lists
 from recipe.models import (
     Ingredients, Recipe, RecipeIngredient,
     Favorite, ShoppingCart, Tag
@@ -49,7 +59,18 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        exclude = ('bit',)
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов с пакетным чтением кэша."""
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        recipes = list(data)
+        self.child.load_viewer(recipes)
+        return recipe_cache.represent(recipes, self.child)
 
 
 class RecipeGetSerializer(serializers.ModelSerializer):
@@ -73,11 +94,40 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         read_only=True,
     )
+    images = ImageSizesField()
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = (
+            'image_width', 'tags_mask', 'favorites_count', 'carts_count',
+        )
         extra_fields = ('is_favorited', 'is_in_shopping_cart')
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, instance):
+        self.load_viewer([instance])
+        return recipe_cache.represent([instance], self)[0]
+
+    def load_viewer(self, recipes):
+        request = self.context.get('request')
+        if request:
+            get_viewer(request).load(
+                recipe_ids=[recipe.id for recipe in recipes],
+                author_ids=[recipe.author_id for recipe in recipes],
+            )
+
+    def shared_representation(self, instance):
+        return super().to_representation(instance)
+
+    def personalize(self, data, instance):
+        request = self.context.get('request')
+        data = dict(data, author=dict(data['author']))
+        data['is_favorited'] = self.get_is_favorited(instance)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(instance)
+        data['author']['is_subscribed'] = check_subscribe(
+            request, instance.author
+        )
+        return data
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
@@ -131,6 +181,25 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             'cooking_time',
         )
 
+    def __init__(self, *args, **kwargs):
+        data = kwargs.get('data')
+        if isinstance(data, QueryDict):
+            kwargs['data'] = self.multipart_data(data)
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def multipart_data(data):
+        """Данные multipart-формы: теги списком, ингредиенты из JSON."""
+        result = data.dict()
+        if 'tags' in data:
+            result['tags'] = data.getlist('tags')
+        if 'ingredients' in data:
+            try:
+                result['ingredients'] = json.loads(data['ingredients'])
+            except ValueError:
+                pass
+        return result
+
     def validate(self, data):
         if not self.initial_data.get('ingredients'):
             raise ValidationError('Рецепт не может быть без ингредиентов.')
@@ -139,19 +208,18 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         return data
 
     def validate_ingredients(self, ingredients):
-        ingredients_list = []
+        ids = [item['id'] for item in ingredients]
+        unique_ids = set(ids)
+        found = Ingredients.objects.in_bulk(unique_ids)
+        if len(found) != len(unique_ids):
+            raise ValidationError('Указан несуществующий ингредиент.')
+        if len(unique_ids) != len(ids):
+            raise ValidationError('Ингредиенты должны быть уникальными!')
         for item in ingredients:
-            try:
-                ingredient = Ingredients.objects.get(id=item['id'])
-            except Ingredients.DoesNotExist:
-                raise ValidationError('Указан несуществующий ингредиент.')
-
-            if ingredient in ingredients_list:
-                raise ValidationError('Ингредиенты должны быть уникальными!')
-
-            ingredients_list.append(ingredient)
+            item['ingredient'] = found[item['id']]
         return ingredients
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get('request')
         ingredients = validated_data.pop('recipe_ingredients')
@@ -161,14 +229,15 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         add_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('recipe_ingredients')
         tags = validated_data.pop('tags')
-        instance.tags.clear()
+        old_amounts = shopping_lists.lock_amounts(instance.id)
         instance.tags.set(tags)
-        instance.ingredients.clear()
         super().update(instance, validated_data)
-        add_ingredients(ingredients, instance)
+        update_ingredients(ingredients, instance)
+        shopping_lists.update_recipe(instance.id, old_amounts)
         return instance
 
     def to_representation(self, instance):
@@ -184,11 +253,27 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Краткая информация о рецепте."""
 
+    images = ImageSizesField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'images',
             'cooking_time',
         )
+
+
+class RecipeMatchSerializer(RecipeShortSerializer):
+    """Рецепт, подобранный по имеющимся ингредиентам."""
+
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeShortSerializer.Meta):
+        fields = RecipeShortSerializer.Meta.fields + (
+            'matched', 'missing', 'coverage',
+        )
@@ -1,32 +1,105 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
-from api.utils.filters import IngredientFilter, RecipeFilter
+from foodgram.constants import (
+    MATCH_LIMIT, MAX_MATCH_LIMIT, SHOPPING_LIST_CHUNK_SIZE
+)
+from api.utils.filters import (
+    POPULAR_ORDERING, IngredientFilter, RecipeFilter
+)
+from api.utils.ingredient_index import ingredient_index
+from api.utils.mixins import CursorPaginationMixin
+from api.utils.paginations import PopularityCursorPagination
+from api.utils.parsers import NDJSONParser
+from api.utils.recipe_import import RecipeImporter
+from api.utils.recipe_matcher import recipe_matcher
+from api.utils.renderers import SHOPPING_LIST_RENDERERS
+from api.utils.shopping_list import SHOPPING_LIST_FORMATS
+from api.utils.uploads import ImageUploadHandler
+from api.utils.versions import (
+    CATALOG, POPULARITY, RECIPES, conditional_response, recipe_key,
+    viewer_key,
+)
 from api.utils.permissoins import IsAdminAuthorOrReadOnly
 from api.users.serializers import ShoppingCartSerializer, FavoriteSerializer
 from recipe.models import (
-    Ingredients, Recipe, RecipeIngredient, Favorite, Tag, ShoppingCart
+    Ingredients, Recipe, Favorite, Tag, ShoppingCart
 )
 from .serializers import (
     IngredientsSerializer, RecipeCreateUpdateSerializer,
-    RecipeGetSerializer, TagSerializer
+    RecipeGetSerializer, RecipeMatchSerializer, TagSerializer
 )
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """Рецепт."""
     queryset = Recipe.objects.all()
     permission_classes = (IsAdminAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    def initialize_request(self, request, *args, **kwargs):
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        if self.action not in ('list', 'retrieve'):
+            return super().get_queryset()
+        return self.queryset.select_related('author')
+
+    def is_popular_ordering(self):
+        return (
+            self.request.query_params.get('ordering') == POPULAR_ORDERING
+        )
+
+    def get_cursor_pagination_class(self):
+        if self.is_popular_ordering():
+            return PopularityCursorPagination
+        return super().get_cursor_pagination_class()
+
+    def is_cursor_pagination(self):
+        # Курсор хранит позицию по полям ordering пагинатора, а поиск
+        # упорядочен по релевантности, которой в курсоре нет.
+        requested = super().is_cursor_pagination()
+        if (
+            requested and self.request.query_params.get('search')
+            and not self.is_popular_ordering()
+        ):
+            raise ValidationError({'pagination': (
+                'Результаты поиска листаются по страницам (?page=), '
+                'курсорная пагинация для них недоступна.'
+            )})
+        return requested
+
+    def list(self, request, *args, **kwargs):
+        keys = (RECIPES, CATALOG, viewer_key(request.user))
+        if self.is_popular_ordering():
+            keys += (POPULARITY,)
+        return conditional_response(
+            request,
+            keys,
+            lambda: super(RecipeViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request,
+            (recipe_key(kwargs['pk']), CATALOG, viewer_key(request.user)),
+            lambda: super(RecipeViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
+
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return RecipeGetSerializer
@@ -37,6 +110,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         methods=['post'],
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic
     def favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         serializer = FavoriteSerializer(
@@ -48,6 +122,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @favorite.mapping.delete
+    @transaction.atomic
     def delete_favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         obj = Favorite.objects.filter(user=request.user, recipe=recipe)
@@ -63,6 +138,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         methods=['post'],
         permission_classes=[IsAuthenticated],
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         serializer = ShoppingCartSerializer(
@@ -80,6 +156,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def delete_shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         obj = ShoppingCart.objects.filter(user=request.user, recipe=recipe)
@@ -93,43 +170,89 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 {'error': err_msg}, status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAuthenticated],
+        parser_classes=[NDJSONParser],
+        url_path='import',
+    )
+    def bulk_import(self, request):
+        report = RecipeImporter(
+            author=request.user, any_author=request.user.is_staff,
+        ).run(request.data)
+        return Response(report)
+
+    @action(detail=False, methods=['get'])
+    def match(self, request):
+        try:
+            ingredient_ids = [
+                int(pk) for pk in request.query_params.getlist('ingredients')
+            ]
+        except ValueError:
+            ingredient_ids = None
+        if not ingredient_ids:
+            raise ValidationError(
+                {'ingredients': 'Укажите id имеющихся ингредиентов.'}
+            )
+        try:
+            limit = int(request.query_params.get('limit', MATCH_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= MAX_MATCH_LIMIT:
+            raise ValidationError(
+                {'limit': f'Лимит должен быть от 1 до {MAX_MATCH_LIMIT}.'}
+            )
+        matches = recipe_matcher.match(ingredient_ids, limit)
+        recipes = Recipe.objects.in_bulk([pk for pk, _, _ in matches])
+        result = []
+        for pk, matched, missing in matches:
+            recipe = recipes.get(pk)
+            if recipe is None:
+                continue
+            recipe.matched, recipe.missing = matched, missing
+            recipe.coverage = matched / (matched + missing)
+            result.append(recipe)
+        return Response(
+            RecipeMatchSerializer(
+                result, many=True, context={'request': request}
+            ).data
+        )
+
     @action(
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS,
     )
     def download_shopping_cart(self, request):
         user = request.user
 
-        if not user.carts.exists():
+        items = user.shopping_list.all()
+        if not items.exists():
             return Response(
                 {'error': 'Корзины пользователя не найдены.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         ingredients = (
-            RecipeIngredient.objects.filter(recipe__carts__user=request.user)
-            .values(
+            items.values(
                 'ingredient__name',
                 'ingredient__measurement_unit',
-            ).annotate(ingredient_amount=Sum('amount'))
+                ingredient_amount=F('amount'),
+            )
+            .order_by('ingredient__name')
+            .iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
         )
-        shopping_list = self.generate_shopping_list(ingredients)
-        file_name = f'{user}_shopping_cart.txt'
-        response = HttpResponse(shopping_list, content_type='text/plain')
+        file_format = request.accepted_renderer.format
+        generate, content_type = SHOPPING_LIST_FORMATS[file_format]
+        response = StreamingHttpResponse(
+            generate(ingredients),
+            content_type=f'{content_type}; charset=utf-8',
+        )
+        file_name = f'{user}_shopping_cart.{file_format}'
         response['Content-Disposition'] = f'attachment; filename={file_name}'
         return response
 
-    def generate_shopping_list(self, ingredients):
-        shopping_list = 'Список покупок:\n'
-
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            unit = ingredient['ingredient__measurement_unit']
-            amount = ingredient['ingredient_amount']
-            shopping_list += f"\n{name} - {amount}/{unit}"
-
-        return shopping_list
-
 
 class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     """Ингридиенты."""
@@ -139,6 +262,22 @@ class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                limit = -1
+            if limit < 0:
+                raise ValidationError(
+                    {'limit': 'Лимит должен быть неотрицательным числом.'}
+                )
+        return Response(ingredient_index.search(name, limit))
+
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """Тэг."""
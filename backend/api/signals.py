@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.utils.ingredient_index import ingredient_index
+from api.utils.recipe_matcher import recipe_matcher
+from api.utils.versions import (
+    CATALOG, POPULARITY, RECIPES, bump_versions, create_versions, recipe_key,
+    user_key,
+)
+from recipe.models import (
+    Favorite, Ingredients, Recipe, RecipeIngredient, ShoppingCart, Tag,
+)
+from recipe.signals import recipes_created
+from user.models import Subscribe
+
+User = get_user_model()
+
+USER_SERVICE_FIELDS = frozenset(('last_login', 'password'))
+
+
+@receiver((post_save, post_delete), sender=Ingredients)
+def invalidate_ingredient_index(**kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def mark_matcher_recipe(instance, created=False, **kwargs):
+    if not created:
+        mark_matcher_recipes([instance.id])
+
+
+@receiver(recipes_created)
+def mark_matcher_created_recipes(recipes, **kwargs):
+    mark_matcher_recipes([recipe.id for recipe in recipes])
+
+
+def mark_matcher_recipes(recipe_ids):
+    def mark():
+        for recipe_id in recipe_ids:
+            recipe_matcher.mark(recipe_id)
+    transaction.on_commit(mark)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def bump_recipe_version(instance, created=False, **kwargs):
+    if not created:
+        bump_versions((recipe_key(instance.id), RECIPES))
+
+
+@receiver(recipes_created)
+def bump_created_recipe_versions(recipes, **kwargs):
+    create_versions([recipe_key(recipe.id) for recipe in recipes])
+    bump_versions((RECIPES,))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def bump_recipe_ingredient_version(instance, **kwargs):
+    bump_versions((recipe_key(instance.recipe_id), RECIPES))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def bump_recipe_tags_version(instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # После очистки связей рецепты тега уже не найти.
+        instance._cleared_recipe_ids = set(
+            instance.recipes.values_list('id', flat=True)
+        )
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_ids = {instance.id}
+    elif pk_set is not None:
+        recipe_ids = pk_set
+    else:
+        recipe_ids = instance.__dict__.pop('_cleared_recipe_ids', ())
+    bump_versions([recipe_key(pk) for pk in recipe_ids] + [RECIPES])
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredients)
+def bump_catalog_version(**kwargs):
+    bump_versions((CATALOG,))
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Subscribe)
+def bump_viewer_version(sender, instance, **kwargs):
+    keys = [user_key(instance.user_id)]
+    if sender is not Subscribe:
+        keys.append(POPULARITY)
+    bump_versions(keys)
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipes_version(instance, created, update_fields, **kwargs):
+    if created or (update_fields and USER_SERVICE_FIELDS >= update_fields):
+        return
+    bump_versions(
+        [
+            recipe_key(pk)
+            for pk in instance.recipes.values_list('id', flat=True)
+        ] + [RECIPES]
+    )
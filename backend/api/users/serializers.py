@@ -1,3 +1,4 @@
+from django.db.models import Manager
 from django.forms import ValidationError
 
 from djoser.serializers import UserCreateSerializer, UserSerializer
@@ -6,6 +7,7 @@ from rest_framework.validators import UniqueTogetherValidator
 
 # Локальные импорты
 from api.utils.check_functions import check_subscribe
+from api.utils.viewer import get_viewer
 from recipe.models import Favorite, ShoppingCart
 from user.models import Subscribe
 
@@ -14,6 +16,17 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
+class UserListSerializer(serializers.ListSerializer):
+    """Список пользователей с одной загрузкой подписок на страницу."""
+
+    def to_representation(self, data):
+        users = list(data.all() if isinstance(data, Manager) else data)
+        request = self.context.get('request')
+        if request:
+            get_viewer(request).load(author_ids=[user.id for user in users])
+        return super().to_representation(users)
+
+
 class UserGetSerializer(UserSerializer):
     """Получение информации о пользователе."""
 
@@ -29,8 +42,11 @@ class UserGetSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
         )
+        list_serializer_class = UserListSerializer
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return check_subscribe(self.context.get('request'), obj)
 
 
@@ -76,7 +92,6 @@ class UserSubscribeReadSerializer(UserGetSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -106,16 +121,16 @@ class UserSubscribeReadSerializer(UserGetSerializer):
         recipes_limit = None
         if request:
             recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
-        if recipes_limit:
-            recipes = obj.recipes.all()[: int(recipes_limit)]
+        if hasattr(obj, 'page_recipes'):
+            recipes = obj.page_recipes
+        else:
+            recipes = obj.recipes.all()
+            if recipes_limit:
+                recipes = obj.recipes.all()[: int(recipes_limit)]
         return RecipeShortSerializer(
             recipes, many=True, context={'request': request}
         ).data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
 
 class UserSubscribeSerializer(serializers.ModelSerializer):
     """Подписка"""
@@ -1,12 +1,18 @@
 from django.contrib.auth import get_user_model
 
+from django.db import transaction
+from django.db.models import BooleanField, Value
+
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from djoser.views import UserViewSet
 
+from api.utils.author_recipes import latest_recipes
+from api.utils.mixins import CursorPaginationMixin
 from api.utils.permissoins import IsAdminAuthorOrReadOnly
 from .serializers import (
     UserSignUpSerializer, UserSubscribeSerializer, UserSubscribeReadSerializer,
@@ -16,7 +22,7 @@ from .serializers import (
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(CursorPaginationMixin, UserViewSet):
     """Костомный пользователь."""
     permission_classes = (IsAdminAuthorOrReadOnly,)
 
@@ -31,6 +37,7 @@ class CustomUserViewSet(UserViewSet):
         return super().get_serializer_class()
 
     @action(detail=True, methods=['post'], url_path='subscribe')
+    @transaction.atomic
     def subscribe(self, request, user_id=None):
         author = get_object_or_404(User, id=user_id)
         serializer = UserSubscribeSerializer(
@@ -42,6 +49,7 @@ class CustomUserViewSet(UserViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['delete'], url_path='unsubscribe')
+    @transaction.atomic
     def unsubscribe(self, request, user_id=None):
         author = get_object_or_404(User, id=user_id)
         follower = request.user.follower.filter(author=author)
@@ -58,8 +66,28 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request, *args, **kwargs):
-        queryset = User.objects.filter(following__user=self.request.user)
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit is not None:
+            try:
+                recipes_limit = int(recipes_limit)
+            except ValueError:
+                recipes_limit = -1
+            if recipes_limit < 0:
+                raise ValidationError({'recipes_limit': (
+                    'Лимит должен быть неотрицательным числом.'
+                )})
+        queryset = User.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+        )
+        page = self.paginate_queryset(queryset)
+        recipes = latest_recipes(
+            (author.id for author in page), recipes_limit
+        )
+        for author in page:
+            author.page_recipes = recipes.get(author.id, [])
         serializer = UserSubscribeReadSerializer(
-            queryset, many=True, context={"request": request}
+            page, many=True, context={'request': request}
         )
-        return Response({'results': serializer.data})
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from recipe.models import Recipe
+
+RECIPE_FIELDS = (
+    'id', 'author', 'name', 'image', 'image_width', 'cooking_time',
+)
+
+
+def latest_recipes(author_ids, limit=None):
+    """Последние limit рецептов каждого автора одним запросом.
+
+    Django 3.2 не умеет фильтровать по оконной функции, поэтому
+    ROW_NUMBER() OVER (PARTITION BY author) считается в сыром SQL.
+    """
+    author_ids = list(author_ids)
+    if not author_ids:
+        return {}
+    result = defaultdict(list)
+    if limit is None:
+        recipes = Recipe.objects.filter(author_id__in=author_ids).only(
+            *RECIPE_FIELDS
+        )
+    else:
+        opts = Recipe._meta
+        columns = ', '.join(
+            opts.get_field(name).column for name in RECIPE_FIELDS
+        )
+        author = opts.get_field('author').column
+        pk = opts.pk.column
+        placeholders = ', '.join(['%s'] * len(author_ids))
+        recipes = Recipe.objects.raw(
+            f'SELECT {columns} FROM ('
+            f'SELECT {columns}, ROW_NUMBER() OVER ('
+            f'PARTITION BY {author} ORDER BY {pk} DESC) AS row_number '
+            f'FROM {opts.db_table} WHERE {author} IN ({placeholders})'
+            f') ranked WHERE row_number <= %s ORDER BY {pk} DESC',
+            [*author_ids, limit],
+        )
+    for recipe in recipes:
+        result[recipe.author_id].append(recipe)
+    return result
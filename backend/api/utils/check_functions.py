@@ -1,21 +1,15 @@
 from django.db import transaction
 
-from recipe.models import Ingredients, RecipeIngredient
+from api.utils.viewer import get_viewer
+from recipe.models import RecipeIngredient
 
 
 def check_subscribe(request, author):
-    return (
-        request.user.is_authenticated
-        and request.user.follower.filter(author=author).exists()
-    )
+    return bool(request) and get_viewer(request).is_subscribed(author.id)
 
 
 def check_recipe(request, obj, model):
-    return (
-        request
-        and request.user.is_authenticated
-        and model.objects.filter(user=request.user, recipe=obj).exists()
-    )
+    return bool(request) and get_viewer(request).has_recipe(model, obj.id)
 
 
 def add_ingredients(ingredients, recipe):
@@ -23,8 +17,43 @@ def add_ingredients(ingredients, recipe):
         RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=Ingredients.objects.get(id=ingredient.get('id')),
+                ingredient=ingredient['ingredient'],
                 amount=ingredient.get('amount'),
             )
             for ingredient in ingredients
         )
+
+
+def update_ingredients(ingredients, recipe):
+    """Изменение только тех строк рецепта, которые действительно поменялись."""
+    current = {
+        item.ingredient_id: item
+        for item in RecipeIngredient.objects.filter(recipe=recipe)
+    }
+    amounts = {
+        ingredient['ingredient'].id: ingredient['amount']
+        for ingredient in ingredients
+    }
+    removed = current.keys() - amounts.keys()
+    changed = []
+    for ingredient_id, item in current.items():
+        amount = amounts.get(ingredient_id)
+        if amount is not None and item.amount != amount:
+            item.amount = amount
+            changed.append(item)
+    created = [
+        RecipeIngredient(
+            recipe=recipe, ingredient_id=ingredient_id, amount=amount,
+        )
+        for ingredient_id, amount in amounts.items()
+        if ingredient_id not in current
+    ]
+    with transaction.atomic():
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed,
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if created:
+            RecipeIngredient.objects.bulk_create(created)
@@ -1,8 +1,11 @@
 import base64
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 
 from rest_framework import serializers
 
+from recipe import images
+
 
 class Base64ImageField(serializers.ImageField):
     """Декодирование изображения."""
@@ -13,3 +16,32 @@ class Base64ImageField(serializers.ImageField):
             ext = format.split('/')[-1]
             data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
         return super().to_internal_value(data)
+
+
+class ImageSizesField(serializers.ReadOnlyField):
+    """Заглушка и производные изображения рецепта разной ширины."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def to_representation(self, recipe):
+        data = images.sizes(recipe.image.name, recipe.image_width)
+        if data is None:
+            return None
+        return {
+            'placeholder': self.url(data['placeholder']),
+            'sizes': [
+                {
+                    'width': size['width'],
+                    'image': self.url(size['image']),
+                    'webp': self.url(size['webp']),
+                }
+                for size in data['sizes']
+            ],
+        }
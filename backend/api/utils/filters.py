@@ -1,6 +1,27 @@
+from django.db.models import F
+from django_filters import fields
 from django_filters.rest_framework import FilterSet, filters
 
-from recipe.models import Ingredients, Recipe, Tag
+from recipe import search as recipe_search
+from recipe import tag_masks
+from recipe.models import Ingredients, Recipe
+
+POPULAR_ORDERING = 'popular'
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_masks.tag_bits.slugs()]
+
+
+class TagSlugsField(fields.MultipleChoiceField):
+    """Slug тегов; перед отказом неизвестный slug ищется в БД."""
+
+    def valid_value(self, value):
+        return tag_masks.tag_bits.has_slug(value)
+
+
+class TagsFilter(filters.MultipleChoiceFilter):
+    field_class = TagSlugsField
 
 
 class IngredientFilter(FilterSet):
@@ -16,10 +37,9 @@ class IngredientFilter(FilterSet):
 class RecipeFilter(FilterSet):
     """Фильтр рецепта."""
 
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = TagsFilter(
+        choices=tag_choices,
+        method='get_tags',
     )
     is_favorited = filters.BooleanFilter(
         method='get_is_favorited',
@@ -27,10 +47,23 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(
+        method='get_search',
+    )
+    ordering = filters.ChoiceFilter(
+        choices=((POPULAR_ORDERING, 'По популярности'),),
+        method='get_ordering',
+    )
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+            'search', 'ordering',
+        )
+
+    def get_tags(self, queryset, name, value):
+        return tag_masks.filter_any(queryset, tag_masks.tag_bits.mask(value))
 
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
@@ -41,3 +74,11 @@ class RecipeFilter(FilterSet):
         if self.request.user.is_authenticated and value:
             return queryset.filter(carts__user=self.request.user)
         return queryset
+
+    def get_search(self, queryset, name, value):
+        return recipe_search.search(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        return queryset.filter(popularity__isnull=False).annotate(
+            popularity_score=F('popularity__score')
+        ).order_by('-popularity_score', '-id')
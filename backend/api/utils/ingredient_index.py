@@ -0,0 +1,87 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from api.utils.versions import CATALOG, get_versions
+from recipe.models import Ingredients
+
+PREFIX_END = chr(0x10FFFF)
+
+
+def catalog_version():
+    return get_versions((CATALOG,)).get(CATALOG, (0,))[0]
+
+
+class IngredientIndex:
+    """Префиксный индекс ингредиентов в памяти процесса.
+
+    Названия хранятся отсортированными в нижнем регистре, поиск по
+    префиксу — один запрос версии каталога и два бинарных поиска.
+    Индекс перестраивается, когда версия каталога (её увеличивает любая
+    запись ингредиентов, в том числе загрузка из csv в другом процессе)
+    отличается от загруженной, после сброса сигналами или по истечении
+    ttl. Загрузка, во время которой индекс сбросили, не считается
+    свежей: её строки могли быть прочитаны до изменения.
+    Ключи и строки лежат в одном неизменяемом кортеже и заменяются
+    одним присваиванием, поэтому поиск никогда не видит ключи одной
+    загрузки со строками другой.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = ((), ())
+        self._loaded_at = None
+        self._version = None
+        self._generation = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+    def is_fresh(self, version=None):
+        ttl = self.ttl
+        if ttl is None:
+            ttl = settings.INGREDIENT_INDEX_TTL
+        return (
+            self._loaded_at is not None
+            and self._version == version
+            and time.monotonic() - self._loaded_at < ttl
+        )
+
+    def load(self, version=None):
+        generation = self._generation
+        rows = sorted(
+            (name.casefold(), pk, name, unit)
+            for pk, name, unit in Ingredients.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        keys = tuple(row[0] for row in rows)
+        items = tuple(
+            {'id': pk, 'name': name, 'measurement_unit': unit}
+            for _, pk, name, unit in rows
+        )
+        with self._lock:
+            self._index = keys, items
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+                self._version = version
+
+    def search(self, prefix, limit=None):
+        version = catalog_version()
+        if not self.is_fresh(version):
+            self.load(version)
+        keys, items = self._index
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + PREFIX_END, lo=start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return list(items[start:end])
+
+
+ingredient_index = IngredientIndex()
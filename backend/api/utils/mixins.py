@@ -1,5 +1,7 @@
 from rest_framework import mixins, viewsets
 
+from .paginations import IdCursorPagination
+
 
 class RecipeMixins(
     mixins.ListModelMixin, mixins.CreateModelMixin,
@@ -7,3 +9,24 @@ class RecipeMixins(
     viewsets.GenericViewSet,
 ):
     pass
+
+
+class CursorPaginationMixin:
+    """Курсорная пагинация по запросу ?pagination=cursor."""
+
+    cursor_pagination_class = IdCursorPagination
+
+    def get_cursor_pagination_class(self):
+        return self.cursor_pagination_class
+
+    def is_cursor_pagination(self):
+        return self.get_cursor_pagination_class().is_requested(self.request)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.is_cursor_pagination():
+                self._paginator = self.get_cursor_pagination_class()()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
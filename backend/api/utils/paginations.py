@@ -1,7 +1,116 @@
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination, PageNumberPagination, _reverse_ordering,
+)
+
+POSITION_SEPARATOR = '|'
 
 
 class PageSizeLimitPagination(PageNumberPagination):
     """Пагинация с лимитом."""
 
     page_size_query_param = 'limit'
+
+
+class IdCursorPagination(CursorPagination):
+    """Курсорная пагинация по -id без подсчёта записей."""
+
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    mode_query_param = 'pagination'
+    mode = 'cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == cls.mode
+            or cls.cursor_query_param in request.query_params
+        )
+
+
+class KeysetCursorPagination(IdCursorPagination):
+    """Курсорная пагинация по составному ключу.
+
+    Позиция курсора — значения всех полей ordering, последнее из которых
+    уникально, поэтому смещение DRF внутри равных позиций (ограниченное
+    offset_cutoff) не нужно. Следующая страница выбирается условием
+    (a < x) OR (a = x AND b < y), которое обслуживает индекс по (a, b).
+    """
+
+    position_types = (int,)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = False, None
+        if self.cursor is not None:
+            self.cursor = self.cursor._replace(offset=0)
+            reverse, position = self.cursor.reverse, self.cursor.position
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.after(self.parse_position(position), reverse)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        if reverse:
+            self.page.reverse()
+            self.next_position, self.previous_position = position, following
+        else:
+            self.next_position, self.previous_position = following, position
+        self.has_next = self.next_position is not None
+        self.has_previous = self.previous_position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, values, reverse):
+        """Условие «строго после позиции» в порядке выдачи."""
+        condition = None
+        for order, value in reversed(list(zip(self.ordering, values))):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') != reverse else 'gt'
+            strict = Q(**{f'{field}__{lookup}': value})
+            if condition is None:
+                condition = strict
+            else:
+                condition = strict | Q(**{field: value}) & condition
+        return condition
+
+    def parse_position(self, position):
+        parts = position.split(POSITION_SEPARATOR)
+        if len(parts) != len(self.position_types):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                cast(part) for cast, part in zip(self.position_types, parts)
+            ]
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return POSITION_SEPARATOR.join(
+            repr(getattr(instance, order.lstrip('-'))) for order in ordering
+        )
+
+
+class PopularityCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация по оценке популярности и id."""
+
+    ordering = ('-popularity_score', '-id')
+    position_types = (float, int)
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+
+from api.utils.versions import CATALOG, get_versions, recipe_key
+from recipe.models import RecipeIngredient
+
+RECIPE_PREFETCH = (
+    'tags',
+    Prefetch(
+        'recipe_ingredients',
+        queryset=RecipeIngredient.objects.select_related('ingredient'),
+    ),
+)
+
+
+class RecipeRepresentationCache:
+    """Кэш общей для всех пользователей части представления рецепта.
+
+    Ключ включает версии рецепта и каталога, поэтому записи перестают
+    читаться сразу после изменения данных; флаги пользователя
+    накладываются поверх при каждом запросе.
+    """
+
+    prefix = 'recipe-representation'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def get_keys(self, recipes, base_url):
+        versions = get_versions(
+            [recipe_key(recipe.id) for recipe in recipes] + [CATALOG]
+        )
+        catalog = versions.get(CATALOG, (0,))[0]
+        host = hashlib.md5(base_url.encode()).hexdigest()[:8]
+        return {
+            recipe.id: (
+                f'{self.prefix}:{recipe.id}:'
+                f'{versions.get(recipe_key(recipe.id), (0,))[0]}:'
+                f'{catalog}:{host}'
+            )
+            for recipe in recipes
+        }
+
+    def represent(self, recipes, serializer):
+        request = serializer.context.get('request')
+        base_url = request.build_absolute_uri('/') if request else ''
+        keys = self.get_keys(recipes, base_url)
+        cached = cache.get_many(keys.values())
+        misses = [
+            recipe for recipe in recipes if keys[recipe.id] not in cached
+        ]
+        if misses:
+            prefetch_related_objects(misses, *RECIPE_PREFETCH)
+            fresh = {
+                keys[recipe.id]: serializer.shared_representation(recipe)
+                for recipe in misses
+            }
+            cache.set_many(fresh, timeout=settings.RECIPE_CACHE_TIMEOUT)
+            cached.update(fresh)
+        with self._lock:
+            self.hits += len(recipes) - len(misses)
+            self.misses += len(misses)
+        return [
+            serializer.personalize(cached[keys[recipe.id]], recipe)
+            for recipe in recipes
+        ]
+
+
+recipe_cache = RecipeRepresentationCache()
@@ -0,0 +1,258 @@
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import DatabaseError, connection, transaction
+from PIL import UnidentifiedImageError
+from rest_framework import serializers
+
+from foodgram.constants import MAX_FIELD_LENGTH, MAX_VALUE, MIN_VALUE
+from api.utils.fields import Base64ImageField
+from recipe import images
+from recipe.models import (
+    Ingredients, Recipe, RecipeIngredient, StoredImage, Tag,
+)
+from recipe.signals import recipes_created
+from recipe.storage import hashed_name
+
+User = get_user_model()
+
+IMAGE_FIELD = Recipe._meta.get_field('image')
+IMAGE_PREFIX = IMAGE_FIELD.upload_to + '/'
+
+
+class RowError(Exception):
+    pass
+
+
+def check_number(value, field):
+    if not isinstance(value, int) or not MIN_VALUE <= value <= MAX_VALUE:
+        raise RowError(
+            {field: f'Ожидается целое число от {MIN_VALUE} до {MAX_VALUE}.'}
+        )
+    return value
+
+
+class RecipeImporter:
+    """Пакетный импорт рецептов из NDJSON.
+
+    Теги, ингредиенты и авторы берутся из словарей, загруженных один
+    раз на импорт. Рецепты, ингредиенты и теги вставляются через
+    bulk_create пачками в отдельных транзакциях; ошибочная строка
+    попадает в отчёт и не прерывает импорт. Изображения из data URI
+    пишутся в хранилище только после вставки своей пачки, а ссылаться
+    можно лишь на уже учтённые в StoredImage файлы рецептов. Поле
+    author учитывается
+    только при any_author: команде и администраторам, остальным
+    рецепты создаются от имени author.
+    """
+
+    def __init__(self, author=None, batch_size=500, any_author=True):
+        self.author = author
+        self.batch_size = batch_size
+        self.any_author = any_author
+        self.tags = {}
+        self.tag_masks = {}
+        for pk, slug, bit in Tag.objects.values_list('id', 'slug', 'bit'):
+            self.tags[pk] = self.tags[slug] = pk
+            self.tag_masks[pk] = 1 << bit
+        self.ingredients = {}
+        for pk, name in Ingredients.objects.values_list('id', 'name'):
+            self.ingredients[pk] = self.ingredients[name] = pk
+        self.authors = {}
+        self.image_names = set()
+        self.image_field = Base64ImageField()
+        self.created = 0
+        self.errors = []
+
+    def run(self, lines):
+        rows = self.parse(lines)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            self.insert(chunk)
+        return {'created': self.created, 'errors': self.errors}
+
+    def parse(self, lines):
+        for number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            try:
+                yield number, self.validate(json.loads(line))
+            except json.JSONDecodeError as error:
+                self.errors.append({'line': number, 'errors': str(error)})
+            except RowError as error:
+                self.errors.append({'line': number, 'errors': error.args[0]})
+
+    def get_author(self, item):
+        email = item.get('author')
+        if email is None:
+            if self.author is None:
+                raise RowError({'author': 'Не указан автор рецепта.'})
+            return self.author
+        if not isinstance(email, str):
+            raise RowError({'author': 'Ожидается email автора.'})
+        if not self.any_author:
+            if self.author is not None and email == self.author.email:
+                return self.author
+            raise RowError({'author': (
+                'Импортировать рецепты другого автора может только '
+                'администратор.'
+            )})
+        if email not in self.authors:
+            self.authors[email] = User.objects.filter(email=email).first()
+        if self.authors[email] is None:
+            raise RowError({'author': f'Пользователь {email} не найден.'})
+        return self.authors[email]
+
+    def validate(self, item):
+        if not isinstance(item, dict):
+            raise RowError('Строка должна быть JSON-объектом.')
+        name = item.get('name')
+        if not isinstance(name, str) or not 0 < len(name) <= MAX_FIELD_LENGTH:
+            raise RowError({'name': 'Некорректное название.'})
+        text = item.get('text')
+        if not isinstance(text, str) or not text:
+            raise RowError({'text': 'Описание не может быть пустым.'})
+        cooking_time = check_number(item.get('cooking_time'), 'cooking_time')
+
+        tags = item.get('tags') or []
+        if not tags:
+            raise RowError({'tags': 'Рецепт не может быть без тега.'})
+        try:
+            tag_ids = [self.tags[tag] for tag in tags]
+        except (KeyError, TypeError):
+            raise RowError({'tags': 'Указан несуществующий тег.'})
+        if len(set(tag_ids)) != len(tag_ids):
+            raise RowError({'tags': 'Теги должны быть уникальными!'})
+
+        ingredients = item.get('ingredients') or []
+        if not isinstance(ingredients, list):
+            raise RowError({'ingredients': 'Ожидается список ингредиентов.'})
+        if not ingredients:
+            raise RowError(
+                {'ingredients': 'Рецепт не может быть без ингредиентов.'}
+            )
+        amounts = {}
+        for ingredient in ingredients:
+            if not isinstance(ingredient, dict):
+                raise RowError(
+                    {'ingredients': 'Ингредиент должен быть JSON-объектом.'}
+                )
+            key = ingredient.get('id', ingredient.get('name'))
+            try:
+                pk = self.ingredients[key]
+            except (KeyError, TypeError):
+                raise RowError(
+                    {'ingredients': 'Указан несуществующий ингредиент.'}
+                )
+            if pk in amounts:
+                raise RowError(
+                    {'ingredients': 'Ингредиенты должны быть уникальными!'}
+                )
+            amounts[pk] = check_number(ingredient.get('amount'), 'amount')
+
+        recipe = Recipe(
+            author=self.get_author(item),
+            name=name,
+            text=text,
+            cooking_time=cooking_time,
+            tags_mask=sum(self.tag_masks[pk] for pk in tag_ids),
+        )
+        upload = self.set_image(recipe, item.get('image'))
+        return recipe, tag_ids, amounts, upload
+
+    def set_image(self, recipe, image):
+        """Имя файла изображения рецепта.
+
+        Для data URI имя вычисляется по хешу содержимого, а сам файл
+        возвращается для записи после вставки рецепта.
+        """
+        if not isinstance(image, str) or not image:
+            raise RowError({'image': 'Не указано изображение.'})
+        if image.startswith('data:image'):
+            try:
+                content = self.image_field.to_internal_value(image)
+            except (serializers.ValidationError, ValueError):
+                raise RowError({'image': 'Некорректное изображение.'})
+            upload_name = IMAGE_FIELD.generate_filename(recipe, content.name)
+            recipe.image.name = hashed_name(upload_name, content)
+            return upload_name, content
+        if image not in self.image_names:
+            if not (
+                image.startswith(IMAGE_PREFIX)
+                and StoredImage.objects.filter(name=image).exists()
+            ):
+                raise RowError({'image': f'Файл {image} не найден.'})
+            try:
+                images.read_width(image)
+            except (
+                OSError, SuspiciousFileOperation, UnidentifiedImageError,
+            ):
+                raise RowError({'image': 'Некорректное изображение.'})
+            self.image_names.add(image)
+        recipe.image.name = image
+        return None
+
+    def insert(self, chunk):
+        try:
+            with transaction.atomic():
+                self.save(chunk)
+        except DatabaseError:
+            for row in chunk:
+                try:
+                    with transaction.atomic():
+                        self.save([row])
+                except DatabaseError as error:
+                    self.errors.append({'line': row[0], 'errors': str(error)})
+
+    @staticmethod
+    def insert_recipes(recipes):
+        """bulk_create с заполнением id у рецептов.
+
+        SQLite в Django 3.2 не возвращает id из пакетной вставки. Первая
+        вставка в транзакции берёт блокировку записи до её конца, а id
+        выдаются по возрастанию, поэтому вставленные строки — последние
+        len(recipes) id в порядке списка. После отката пачки у рецептов
+        остаются id неудачной вставки, поэтому они сбрасываются.
+        """
+        for recipe in recipes:
+            recipe.id = None
+        Recipe.objects.bulk_create(recipes)
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+        recipe_ids = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:len(recipes)]
+        for recipe, pk in zip(recipes, sorted(recipe_ids)):
+            recipe.id = pk
+
+    def save(self, chunk):
+        recipes = [recipe for _, (recipe, _, _, _) in chunk]
+        self.insert_recipes(recipes)
+        recipes_created.send(sender=Recipe, recipes=recipes)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount,
+            )
+            for _, (recipe, _, amounts, _) in chunk
+            for ingredient_id, amount in amounts.items()
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+            for _, (recipe, tag_ids, _, _) in chunk
+            for tag_id in tag_ids
+        )
+        # Файлы пишутся последними: если вставка не удалась, на диске
+        # не остаётся изображений без ссылок.
+        uploads = {
+            recipe.image.name: upload
+            for _, (recipe, _, _, upload) in chunk if upload
+        }
+        for upload_name, content in uploads.values():
+            images.image_storage.save(upload_name, content)
+        self.created += len(chunk)
@@ -0,0 +1,179 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.utils.versions import recipe_key
+from recipe.models import DataVersion, RecipeIngredient
+
+RECIPE_KEY_PREFIX = recipe_key('')
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class RecipeMatcher:
+    """Обратный индекс «ингредиент → рецепты» в памяти процесса.
+
+    Для каждого ингредиента хранится отсортированный массив id
+    рецептов, для каждого рецепта — его ингредиенты. Подбор по
+    имеющимся продуктам складывает массивы выбранных ингредиентов и
+    не обращается к БД. Изменения рецептов в этом процессе применяются
+    после фиксации транзакции, изменения в других процессах
+    подтягиваются по версиям рецептов не реже sync_interval, а индекс
+    целиком перестраивается по истечении ttl.
+    """
+
+    def __init__(self, ttl=None, sync_interval=None):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._recipes = {}
+        self._dirty = set()
+        self._max_id = 0
+        self._loaded_at = None
+        self._synced_at = None
+        self._synced_since = None
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def mark(self, recipe_id):
+        """Рецепт изменился: перечитать его при следующем подборе."""
+        self._dirty.add(recipe_id)
+
+    def load(self):
+        started = timezone.now()
+        recipes = defaultdict(set)
+        for recipe_id, ingredient_id in (
+            RecipeIngredient.objects.values_list('recipe_id', 'ingredient_id')
+            .order_by('recipe_id')
+            .iterator(chunk_size=10000)
+        ):
+            recipes[recipe_id].add(ingredient_id)
+        postings = defaultdict(lambda: defaultdict(lambda: array('q')))
+        for recipe_id, ingredient_ids in recipes.items():
+            for ingredient_id in ingredient_ids:
+                postings[ingredient_id][len(ingredient_ids)].append(recipe_id)
+        with self._lock:
+            self._recipes = {
+                pk: tuple(ids) for pk, ids in recipes.items()
+            }
+            self._postings = {
+                pk: dict(by_size) for pk, by_size in postings.items()
+            }
+            self._max_id = max(recipes, default=0)
+            self._dirty.clear()
+            self._loaded_at = self._synced_at = time.monotonic()
+            self._synced_since = started
+
+    def sync(self):
+        """Перечитывание рецептов, изменённых с прошлой синхронизации."""
+        started = timezone.now()
+        changed = set(self._dirty)
+        self._dirty -= changed
+        changed.update(
+            int(key[len(RECIPE_KEY_PREFIX):])
+            for key in DataVersion.objects.filter(
+                key__startswith=RECIPE_KEY_PREFIX,
+                modified__gte=self._synced_since - SYNC_OVERLAP,
+            ).values_list('key', flat=True)
+        )
+        recipes = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=changed
+        ).values_list('recipe_id', 'ingredient_id'):
+            recipes[recipe_id].add(ingredient_id)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__gt=self._max_id
+        ).values_list('recipe_id', 'ingredient_id'):
+            changed.add(recipe_id)
+            recipes[recipe_id].add(ingredient_id)
+        with self._lock:
+            for recipe_id in changed:
+                self.replace(recipe_id, recipes.get(recipe_id, ()))
+            self._synced_at = time.monotonic()
+            self._synced_since = started
+
+    def replace(self, recipe_id, ingredient_ids):
+        old = self._recipes.pop(recipe_id, ())
+        for ingredient_id in old:
+            by_size = self._postings[ingredient_id]
+            posting = by_size[len(old)]
+            posting.pop(bisect_left(posting, recipe_id))
+            if not posting:
+                del by_size[len(old)]
+            if not by_size:
+                del self._postings[ingredient_id]
+        new = tuple(set(ingredient_ids))
+        for ingredient_id in new:
+            posting = self._postings.setdefault(ingredient_id, {}).setdefault(
+                len(new), array('q')
+            )
+            posting.insert(bisect_left(posting, recipe_id), recipe_id)
+        if new:
+            self._recipes[recipe_id] = new
+        self._max_id = max(self._max_id, recipe_id)
+
+    def refresh(self):
+        ttl, sync_interval = self.ttl, self.sync_interval
+        if ttl is None:
+            ttl = settings.RECIPE_MATCHER_TTL
+        if sync_interval is None:
+            sync_interval = settings.RECIPE_MATCHER_SYNC_INTERVAL
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= ttl:
+            self.load()
+        elif self._dirty or now - self._synced_at >= sync_interval:
+            self.sync()
+
+    def match(self, ingredient_ids, limit):
+        """Рецепты по доле имеющихся ингредиентов.
+
+        Возвращает до limit кортежей (id рецепта, найдено, не хватает):
+        сначала наибольшее покрытие, затем наименьшее число недостающих
+        ингредиентов, затем более новые рецепты. Массивы разложены по
+        числу ингредиентов рецепта: группы (найдено, всего) перебираются
+        в порядке покрытия, и совпадения считаются только для тех
+        размеров рецептов, до которых дошёл перебор.
+        """
+        self.refresh()
+        ingredient_ids = set(ingredient_ids)
+        with self._lock:
+            postings = [
+                self._postings[pk] for pk in ingredient_ids
+                if pk in self._postings
+            ]
+            groups = defaultdict(list)
+            for matched, size in sorted(
+                (matched, size)
+                for size in set().union(*postings)
+                for matched in range(1, min(size, len(ingredient_ids)) + 1)
+            ):
+                groups[matched / size, size - matched].append((matched, size))
+            counts = {}
+            result = []
+            for key in sorted(groups, key=lambda key: (-key[0], key[1])):
+                found = []
+                for matched, size in groups[key]:
+                    if size not in counts:
+                        counts[size] = Counter()
+                        for by_size in postings:
+                            counts[size].update(by_size.get(size, ()))
+                    found.extend(
+                        (recipe_id, matched, size - matched)
+                        for recipe_id, count in counts[size].items()
+                        if count == matched
+                    )
+                found.sort(reverse=True)
+                result.extend(found[:limit - len(result)])
+                if len(result) >= limit:
+                    break
+        return result
+
+
+recipe_matcher = RecipeMatcher()
@@ -0,0 +1,52 @@
+import csv
+import json
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def text_lines(ingredients):
+    yield 'Список покупок:\n'
+    for ingredient in ingredients:
+        yield (
+            f"\n{ingredient['ingredient__name']} - "
+            f"{ingredient['ingredient_amount']}/"
+            f"{ingredient['ingredient__measurement_unit']}"
+        )
+
+
+def csv_lines(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['ingredient_amount'],
+        ))
+
+
+def json_chunks(ingredients):
+    yield '['
+    for number, ingredient in enumerate(ingredients):
+        item = json.dumps(
+            {
+                'name': ingredient['ingredient__name'],
+                'measurement_unit': ingredient['ingredient__measurement_unit'],
+                'amount': ingredient['ingredient_amount'],
+            },
+            ensure_ascii=False,
+        )
+        yield f',{item}' if number else item
+    yield ']'
+
+
+SHOPPING_LIST_FORMATS = {
+    'txt': (text_lines, 'text/plain'),
+    'csv': (csv_lines, 'text/csv'),
+    'json': (json_chunks, 'application/json'),
+}
@@ -0,0 +1,60 @@
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+from PIL import Image
+
+HEADER_LIMIT = 256 * 1024
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Потоковая загрузка изображения во временный файл.
+
+    Размер и габариты проверяются по мере поступления частей файла:
+    габариты известны уже по заголовку, поэтому слишком большое
+    изображение отклоняется до чтения всего тела запроса. Заодно
+    считается sha256 содержимого, он доступен как file.sha256.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.header = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            raise MultiPartParserError(
+                'Размер изображения превышает '
+                f'{settings.IMAGE_MAX_UPLOAD_SIZE} байт.'
+            )
+        if self.header is not None:
+            self.check_dimensions(raw_data)
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def check_dimensions(self, raw_data):
+        self.header += raw_data
+        try:
+            # Image.open читает только заголовок, не раскодируя пиксели.
+            width, height = Image.open(io.BytesIO(self.header)).size
+        except Image.DecompressionBombError:
+            width = height = settings.IMAGE_MAX_DIMENSION + 1
+        except (OSError, SyntaxError, ValueError):
+            if len(self.header) >= HEADER_LIMIT:
+                self.header = None
+            return
+        self.header = None
+        if max(width, height) > settings.IMAGE_MAX_DIMENSION:
+            raise MultiPartParserError(
+                'Сторона изображения превышает '
+                f'{settings.IMAGE_MAX_DIMENSION} px.'
+            )
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+
+from recipe.models import DataVersion
+
+RECIPES = 'recipes'
+CATALOG = 'catalog'
+POPULARITY = 'popularity'
+COLLECTIONS = frozenset((RECIPES, CATALOG, POPULARITY))
+
+_pending = threading.local()
+
+
+def recipe_key(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def viewer_key(user):
+    if user.is_authenticated:
+        return user_key(user.id)
+    return 'anonymous'
+
+
+def bump_versions(keys):
+    """Увеличение версий ключей; отсутствующие ключи создаются.
+
+    Общие ключи коллекций (COLLECTIONS) меняет почти любая запись, и
+    блокировка их строк держалась бы до конца каждой транзакции. Поэтому
+    они увеличиваются один раз после фиксации транзакции.
+    """
+    keys = set(keys)
+    collections = keys & COLLECTIONS
+    if collections:
+        pending = getattr(_pending, 'keys', None)
+        if pending is None:
+            pending = _pending.keys = set()
+        pending |= collections
+        transaction.on_commit(bump_pending_versions)
+    update_versions(keys - collections)
+
+
+def create_versions(keys):
+    """Версии новых объектов: их ключей ещё нет, хватает одного INSERT."""
+    now = timezone.now()
+    DataVersion.objects.bulk_create(
+        (DataVersion(key=key, version=1, modified=now) for key in keys),
+        ignore_conflicts=True,
+    )
+
+
+def bump_pending_versions():
+    """Ключи коллекций, накопленные к фиксации транзакции.
+
+    Первый вызов после фиксации забирает все ключи, остальные ничего не
+    делают. Ключи отменённой транзакции увеличиваются со следующей —
+    лишнее увеличение версии лишь сбрасывает кэш клиентов.
+    """
+    keys = getattr(_pending, 'keys', None)
+    _pending.keys = None
+    if keys:
+        update_versions(keys)
+
+
+def update_versions(keys):
+    """Обычно ключи уже есть, и хватает одного UPDATE; иначе недостающие
+    создаются, и версии увеличиваются ещё раз."""
+    if not keys:
+        return
+    now = timezone.now()
+    versions = DataVersion.objects.filter(key__in=keys)
+    if versions.update(version=F('version') + 1, modified=now) == len(keys):
+        return
+    DataVersion.objects.bulk_create(
+        (DataVersion(key=key, modified=now) for key in keys),
+        ignore_conflicts=True,
+    )
+    versions.update(version=F('version') + 1, modified=now)
+
+
+def get_versions(keys):
+    return {
+        key: (version, modified)
+        for key, version, modified in DataVersion.objects.filter(
+            key__in=keys
+        ).values_list('key', 'version', 'modified')
+    }
+
+
+def conditional_response(request, keys, get_response):
+    """Ответ 304 по ETag/Last-Modified без сериализации.
+
+    Версии читаются одним запросом до построения ответа, поэтому
+    валидаторы никогда не бывают новее отданных данных.
+    """
+    versions = get_versions(keys)
+    stamp = ';'.join(
+        f'{key}={versions.get(key, (0,))[0]}' for key in sorted(keys)
+    )
+    variant = f'{request.accepted_renderer.format}:{request.get_full_path()}'
+    etag = '"{}"'.format(
+        hashlib.sha1(f'{stamp}|{variant}'.encode()).hexdigest()
+    )
+    modified = [item[1] for item in versions.values()]
+    last_modified = int(max(modified).timestamp()) if modified else None
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified,
+    )
+    if response is None:
+        response = get_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return response
@@ -0,0 +1,73 @@
+from django.db.models import CharField, Value
+
+from recipe.models import Favorite, ShoppingCart
+from user.models import Subscribe
+
+FAVORITES = 'favorites'
+CART = 'cart'
+FOLLOWS = 'follows'
+RECIPE_SETS = {Favorite: FAVORITES, ShoppingCart: CART}
+
+
+class Viewer:
+    """Избранное, корзина и подписки текущего пользователя.
+
+    Множества id подгружаются лениво и только для объектов текущей
+    страницы: все три выборки уходят в БД одним UNION ALL, повторная
+    проверка того же объекта запросов не делает. Для анонимного
+    пользователя ничего не загружается.
+    """
+
+    def __init__(self, user):
+        self.user = user if user.is_authenticated else None
+        self.ids = {FAVORITES: set(), CART: set(), FOLLOWS: set()}
+        self.loaded_recipes = set()
+        self.loaded_authors = set()
+
+    def load(self, recipe_ids=(), author_ids=()):
+        if self.user is None:
+            return
+        recipe_ids = set(recipe_ids) - self.loaded_recipes
+        author_ids = set(author_ids) - self.loaded_authors
+        queries = []
+        if recipe_ids:
+            queries.extend(
+                self.select(model, name, 'recipe_id', recipe_id__in=recipe_ids)
+                for model, name in RECIPE_SETS.items()
+            )
+        if author_ids:
+            queries.append(self.select(
+                Subscribe, FOLLOWS, 'author_id', author_id__in=author_ids,
+            ))
+        if not queries:
+            return
+        for name, pk in queries[0].union(*queries[1:], all=True):
+            self.ids[name].add(pk)
+        self.loaded_recipes |= recipe_ids
+        self.loaded_authors |= author_ids
+
+    def select(self, model, name, field, **lookup):
+        return model.objects.filter(user=self.user, **lookup).annotate(
+            set_name=Value(name, output_field=CharField()),
+        ).values_list('set_name', field).order_by()
+
+    def has_recipe(self, model, recipe_id):
+        if self.user is None:
+            return False
+        self.load(recipe_ids=(recipe_id,))
+        return recipe_id in self.ids[RECIPE_SETS[model]]
+
+    def is_subscribed(self, author_id):
+        if self.user is None:
+            return False
+        self.load(author_ids=(author_id,))
+        return author_id in self.ids[FOLLOWS]
+
+
+def get_viewer(request):
+    """Viewer, общий для всех сериализаторов одного запроса."""
+    viewer = getattr(request, 'viewer', None)
+    if viewer is None:
+        viewer = Viewer(request.user)
+        request.viewer = viewer
+    return viewer
@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 LENGHT_256 = 256
 MAX_NAME_LENGTH = 150
 MAX_EMAIL_LENGHT = 254
@@ -9,3 +11,21 @@ USER_ME = 'me'
 MIN_VALUE = 1
 MAX_VALUE = 32000
 MAX_INFO_LENGTH = 35
+MAX_TAGS = 63
+TAG_MASK_IN_BITS = 8
+SHOPPING_LIST_CHUNK_SIZE = 500
+MATCH_LIMIT = 10
+MAX_MATCH_LIMIT = 100
+IMAGE_WIDTHS = (160, 320, 640, 1280)
+IMAGE_PLACEHOLDER_WIDTH = 16
+IMAGE_QUALITY = 80
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+POPULARITY_FAVORITE_WEIGHT = 1.0
+POPULARITY_CART_WEIGHT = 2.0
+POPULARITY_EMPTY_SCORE = float('-inf')
+POPULARITY_REMAINDER = 2 ** -30
+# Показатель оценки растёт на единицу за период полураспада; с периодом
+# от часа он и через тысячу лет различает события с точностью до долей
+# секунды.
+POPULARITY_MIN_HALF_LIFE_DAYS = 1 / 24
+ADMIN_EXACT_COUNT_LIMIT = 10000
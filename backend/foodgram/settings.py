@@ -1,8 +1,11 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
+from foodgram.constants import POPULARITY_MIN_HALF_LIFE_DAYS
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -29,6 +32,7 @@ INSTALLED_APPS = [
     'api',
     'recipe',
     'user',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -124,6 +128,37 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 6,
 }
 
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+
+TAG_BITS_TTL = int(os.getenv('TAG_BITS_TTL', 300))
+
+RECIPE_MATCHER_TTL = int(os.getenv('RECIPE_MATCHER_TTL', 60 * 60))
+RECIPE_MATCHER_SYNC_INTERVAL = int(
+    os.getenv('RECIPE_MATCHER_SYNC_INTERVAL', 5)
+)
+
+RECIPE_CACHE_TIMEOUT = int(os.getenv('RECIPE_CACHE_TIMEOUT', 60 * 60))
+
+IMAGE_MAX_UPLOAD_SIZE = int(
+    os.getenv('IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 8000))
+
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_DELAY = int(os.getenv('JOBS_RETRY_DELAY', 10))
+
+POPULARITY_HALF_LIFE_DAYS = float(
+    os.getenv('POPULARITY_HALF_LIFE_DAYS', 7)
+)
+if not (
+    POPULARITY_MIN_HALF_LIFE_DAYS <= POPULARITY_HALF_LIFE_DAYS < float('inf')
+):
+    raise ImproperlyConfigured(
+        'POPULARITY_HALF_LIFE_DAYS должен быть не меньше '
+        f'{POPULARITY_MIN_HALF_LIFE_DAYS:.4f} дня.'
+    )
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'HIDE_USERS': False,
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+from uuid import uuid4
+
+import django
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Обработчик очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Количество одновременно выполняемых задач.',
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Пул процессов вместо пула потоков.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между опросами пустой очереди, секунд.',
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Через сколько секунд зависшая задача вернётся в очередь.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        workers = options['workers']
+        if options['processes']:
+            # spawn: дочерние процессы открывают свои соединения с БД,
+            # а не наследуют сокет родителя.
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        done = failed = 0
+        running = {}
+        with executor:
+            while True:
+                # Отметка продлевается на каждом проходе цикла, то есть
+                # не реже раза в poll_interval: долгие задачи не
+                # считаются зависшими, пока жив их обработчик очереди.
+                queue.heartbeat(worker, list(running.values()))
+                queue.requeue_stale(options['stale_after'])
+                for job_id in queue.claim(worker, workers - len(running)):
+                    future = executor.submit(queue.execute, job_id, worker)
+                    running[future] = job_id
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                finished, _ = wait(
+                    running, timeout=options['poll_interval'],
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in finished:
+                    job_id = running.pop(future)
+                    try:
+                        succeeded = future.result()
+                    except Exception as error:
+                        # Ошибка БД при чтении или сохранении задачи не
+                        # должна останавливать обработчик: задача
+                        # вернётся в очередь через requeue_stale.
+                        self.stderr.write(f'Задача #{job_id}: {error!r}')
+                        succeeded = False
+                    if succeeded:
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:30
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_heartbeat(apps, schema_editor):
+    apps.get_model('jobs', 'Job').objects.filter(
+        status='running',
+    ).update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний отклик'),
+        ),
+        migrations.RunPython(fill_heartbeat, migrations.RunPython.noop),
+    ]
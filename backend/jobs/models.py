@@ -0,0 +1,97 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача, которую выполняет команда run_jobs."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name='Обработчик',
+        max_length=100,
+    )
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=255,
+        null=True,
+        blank=True,
+    )
+    payload = models.JSONField(
+        verbose_name='Параметры',
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попытки',
+        default=0,
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Не раньше',
+        default=timezone.now,
+    )
+    worker = models.CharField(
+        verbose_name='Обработчик очереди',
+        max_length=100,
+        blank=True,
+    )
+    started = models.DateTimeField(
+        verbose_name='Начало',
+        null=True,
+        blank=True,
+    )
+    heartbeat = models.DateTimeField(
+        verbose_name='Последний отклик',
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField(
+        verbose_name='Завершение',
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name='Ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-id']
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'], name='job_status_run_after',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status='queued'),
+                name='unique_queued_job_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.id}'
@@ -0,0 +1,142 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+HANDLERS = {}
+
+
+def register(name):
+    """Регистрация обработчика задач с именем name."""
+    def decorator(handler):
+        HANDLERS[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(task, key=None, **payload):
+    """Постановка задачи task в очередь.
+
+    Задача сохраняется в текущей транзакции и становится видна
+    обработчикам очереди только после её фиксации. Задача с ключом key
+    не дублируется, пока такая же ждёт в очереди. В режиме JOBS_EAGER
+    обработчик вызывается сразу после фиксации транзакции.
+    """
+    if task not in HANDLERS:
+        raise KeyError(f'Неизвестная задача: {task}')
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: HANDLERS[task](**payload))
+        return
+    Job.objects.bulk_create(
+        [Job(
+            name=task, key=key, payload=payload,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        )],
+        ignore_conflicts=True,
+    )
+
+
+def requeue_stale(timeout):
+    """Возврат в очередь задач, обработчик которых перестал отвечать.
+
+    Задача считается зависшей, если её обработчик очереди дольше
+    timeout секунд не продлевал отметку heartbeat. Задачи возвращаются
+    по одной: в очереди может стоять только одна задача с данным
+    ключом, поэтому из нескольких зависших задач с одинаковым ключом
+    остальные помечаются ошибкой.
+    """
+    deadline = timezone.now() - timedelta(seconds=timeout)
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat__lt=deadline)
+    requeued = 0
+    for job_id in stale.order_by('id').values_list('id', flat=True):
+        job = stale.filter(id=job_id)
+        try:
+            with transaction.atomic():
+                requeued += job.update(status=Job.QUEUED, worker='')
+        except IntegrityError:
+            job.update(
+                status=Job.FAILED, finished=timezone.now(),
+                error='Такая же задача уже стоит в очереди.',
+            )
+    return requeued
+
+
+def heartbeat(worker, job_ids):
+    """Продление отметки heartbeat у задач, которые выполняет worker."""
+    if not job_ids:
+        return 0
+    return Job.objects.filter(
+        id__in=job_ids, status=Job.RUNNING, worker=worker,
+    ).update(heartbeat=timezone.now())
+
+
+def claim(worker, limit):
+    """Захват до limit готовых к выполнению задач.
+
+    На Postgres строки блокируются через SELECT ... FOR UPDATE SKIP
+    LOCKED, поэтому параллельные обработчики не ждут друг друга. Метка
+    worker в UPDATE с условием на статус защищает от двойного захвата
+    и там, где SKIP LOCKED недоступен.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = Job.objects.filter(
+            status=Job.QUEUED, run_after__lte=now,
+        ).order_by('run_after', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        job_ids = list(jobs.values_list('id', flat=True)[:limit])
+        Job.objects.filter(id__in=job_ids, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started=now, heartbeat=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(
+        id__in=job_ids, status=Job.RUNNING, worker=worker,
+    ).values_list('id', flat=True))
+
+
+def execute(job_id, worker):
+    """Выполнение захваченной задачи с повтором при ошибке.
+
+    Повторы откладываются экспоненциально: JOBS_RETRY_DELAY, затем
+    вдвое больше и так далее, пока не исчерпан max_attempts. Статус
+    меняется, только пока задача числится за worker: задачу, которую
+    requeue_stale уже вернул в очередь, завершает другой обработчик.
+    """
+    try:
+        owned = Job.objects.filter(
+            id=job_id, status=Job.RUNNING, worker=worker,
+        )
+        job = owned.get()
+        try:
+            HANDLERS[job.name](**job.payload)
+        except Exception:
+            retry(owned, job, traceback.format_exc())
+            return False
+        return bool(owned.update(
+            status=Job.DONE, finished=timezone.now(), error='',
+        ))
+    finally:
+        connection.close()
+
+
+def retry(owned, job, error):
+    changes = {'error': error}
+    if job.attempts < job.max_attempts:
+        changes['status'] = Job.QUEUED
+        changes['run_after'] = timezone.now() + timedelta(
+            seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        )
+    else:
+        changes['status'] = Job.FAILED
+        changes['finished'] = timezone.now()
+    try:
+        with transaction.atomic():
+            owned.update(**changes)
+    except IntegrityError:
+        owned.delete()
@@ -2,10 +2,12 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.utils.safestring import mark_safe
 
+from . import shopping_lists
 from .models import (
     Ingredients, Recipe,
     RecipeIngredient, Tag, Favorite, ShoppingCart
 )
+from .paginators import EstimatedCountPaginator
 
 User = get_user_model()
 
@@ -13,9 +15,11 @@ User = get_user_model()
 @admin.register(Ingredients)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'measurement_unit')
-    search_fields = ('name',)
-    list_filter = ('name',)
+    search_fields = ('^name',)
+    list_filter = ('measurement_unit',)
     list_display_links = ('name',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
 
 @admin.register(Tag)
@@ -29,21 +33,39 @@ class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 0
     min_num = 1
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'recipe', 'ingredient',
+        )
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'author', 'favorites_amount', 'get_img')
-    search_fields = ('name', 'author')
-    list_filter = ('name', 'author', 'tags')
+    list_select_related = ('author',)
+    search_fields = ('^name', '^author__username', '=author__email')
+    list_filter = ('tags',)
     list_display_links = ('name',)
+    autocomplete_fields = ('author',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     inlines = (RecipeIngredientInline,)
     readonly_fields = ('favorites_amount',)
     filter_horizontal = ('tags',)
 
-    @admin.display(description='Добавлено в избранное')
+    def save_related(self, request, form, formsets, change):
+        old_amounts = shopping_lists.lock_amounts(form.instance.id)
+        super().save_related(request, form, formsets, change)
+        if change:
+            shopping_lists.update_recipe(form.instance.id, old_amounts)
+
+    @admin.display(
+        description='Добавлено в избранное', ordering='favorites_count',
+    )
     def favorites_amount(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     @admin.display(description='Изображение')
     def get_img(self, obj):
@@ -54,10 +76,18 @@ class RecipeAdmin(admin.ModelAdmin):
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe__author')
+    search_fields = ('^user__username', '=user__email', '^recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe__author')
+    search_fields = ('^user__username', '=user__email', '^recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
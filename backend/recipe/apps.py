@@ -6,3 +6,6 @@ class RecipeConfig(AppConfig):
     name = 'recipe'
     verbose_name = 'Рецепт'
     verbose_name_plural = 'Рецепты'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+
+from user.models import Subscribe
+from .models import Favorite, Recipe, ShoppingCart
+
+User = get_user_model()
+
+RECIPE_COUNTERS = {
+    'favorites_count': (Favorite, 'recipe_id'),
+    'carts_count': (ShoppingCart, 'recipe_id'),
+}
+USER_COUNTERS = {
+    'recipes_count': (Recipe, 'author_id'),
+    'followers_count': (Subscribe, 'author_id'),
+}
+
+
+def change(model, pk, **deltas):
+    """Атомарное изменение счётчиков строки через F()."""
+    model.objects.filter(pk=pk).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def reconcile(model, counters, ids, dry_run=False):
+    """Сверка счётчиков строк ids с живыми данными.
+
+    Возвращает количество строк с расхождением; без dry_run
+    исправляет их одним bulk_update. Строки блокируются до подсчёта:
+    change() из других транзакций ждёт исправления и прибавляет своё
+    уже к верному значению, а транзакции, успевшие изменить счётчик
+    раньше, фиксируются до подсчёта и попадают в него.
+    """
+    ids = list(ids)
+    with transaction.atomic(savepoint=False):
+        objects = model.objects.filter(pk__in=ids).only('pk', *counters)
+        if not dry_run:
+            objects = objects.select_for_update()
+        objects = list(objects.order_by('pk'))
+        actual = {
+            field: dict(
+                source.objects.filter(**{f'{column}__in': ids})
+                .values_list(column).annotate(total=Count('pk')).order_by()
+            )
+            for field, (source, column) in counters.items()
+        }
+        changed = []
+        for obj in objects:
+            drift = False
+            for field in counters:
+                value = actual[field].get(obj.pk, 0)
+                if getattr(obj, field) != value:
+                    setattr(obj, field, value)
+                    drift = True
+            if drift:
+                changed.append(obj)
+        if changed and not dry_run:
+            model.objects.bulk_update(changed, list(counters))
+    return len(changed)
+
+
+def reconcile_recipes(recipe_ids, dry_run=False):
+    return reconcile(Recipe, RECIPE_COUNTERS, recipe_ids, dry_run)
+
+
+def reconcile_users(user_ids, dry_run=False):
+    return reconcile(User, USER_COUNTERS, user_ids, dry_run)
@@ -0,0 +1,197 @@
+import io
+import posixpath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from PIL import Image
+
+from foodgram.constants import (
+    IMAGE_PLACEHOLDER_WIDTH, IMAGE_QUALITY, IMAGE_WIDTHS
+)
+from .models import Recipe, StoredImage
+
+FORMATS = {'JPEG': 'jpg', 'PNG': 'png'}
+image_storage = Recipe._meta.get_field('image').storage
+
+
+def derivative_dir(name):
+    """Каталог производных изображения: <каталог>/derivatives/<имя>/."""
+    folder, file_name = posixpath.split(name)
+    return posixpath.join(
+        folder, 'derivatives', posixpath.splitext(file_name)[0]
+    )
+
+
+def placeholder_name(name):
+    return posixpath.join(derivative_dir(name), 'placeholder.webp')
+
+
+def derivative_name(name, width, extension):
+    return posixpath.join(derivative_dir(name), f'{width}.{extension}')
+
+
+def original_extension(name):
+    extension = posixpath.splitext(name)[1].lstrip('.').lower()
+    if extension == 'jpeg':
+        return 'jpg'
+    return extension if extension in FORMATS.values() else 'png'
+
+
+def widths(image_width):
+    """Ширины производных, которые меньше оригинала."""
+    return [width for width in IMAGE_WIDTHS if width < image_width]
+
+
+def sizes(name, image_width):
+    """Пути производных изображения без обращения к хранилищу."""
+    if not name or not image_width:
+        return None
+    extension = original_extension(name)
+    return {
+        'placeholder': placeholder_name(name),
+        'sizes': [
+            {
+                'width': width,
+                'image': derivative_name(name, width, extension),
+                'webp': derivative_name(name, width, 'webp'),
+            }
+            for width in widths(image_width)
+        ],
+    }
+
+
+def save(name, image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def resize(image, width):
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def generate(name, force=False):
+    """Создание производных изображения, возвращает ширину оригинала.
+
+    Производные лежат по детерминированным путям, поэтому рецепты с
+    одним и тем же файлом используют их совместно, а повторный вызов
+    без force ограничивается проверкой заглушки.
+    """
+    with image_storage.open(name) as file:
+        image = Image.open(file)
+        if not force and default_storage.exists(placeholder_name(name)):
+            return image.width
+        image.load()
+    extension = original_extension(name)
+    image_format = next(
+        key for key, value in FORMATS.items() if value == extension
+    )
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    for width in widths(image.width):
+        derivative = resize(image, width)
+        save(
+            derivative_name(name, width, extension), derivative,
+            image_format, quality=IMAGE_QUALITY, optimize=True,
+        )
+        save(
+            derivative_name(name, width, 'webp'), derivative, 'WEBP',
+            quality=IMAGE_QUALITY,
+        )
+    save(
+        placeholder_name(name),
+        resize(image, min(IMAGE_PLACEHOLDER_WIDTH, image.width)),
+        'WEBP', quality=30,
+    )
+    return image.width
+
+
+def read_width(name):
+    """Ширина изображения по заголовку файла."""
+    with image_storage.open(name) as file:
+        return Image.open(file).width
+
+
+def needs_derivatives(recipe):
+    return bool(recipe.image) and (
+        not recipe.image_width
+        or not default_storage.exists(placeholder_name(recipe.image.name))
+    )
+
+
+def update_recipes(name, force=False):
+    """Производные для файла name и ширина у всех рецептов с ним.
+
+    Возвращает id рецептов, у которых изменилась ширина.
+    """
+    image_width = generate(name, force)
+    recipes = Recipe.objects.filter(image=name).exclude(
+        image_width=image_width
+    )
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    if recipe_ids:
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            image_width=image_width
+        )
+    return recipe_ids
+
+
+def change_references(deltas):
+    """Изменение числа ссылок на файлы изображений.
+
+    Строки файлов блокируются в порядке имён до конца транзакции, чтобы
+    delete_files не удалил файл, на который здесь появляется ссылка.
+    Возвращает имена файлов, на которые больше никто не ссылается.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if name and delta}
+    if not deltas:
+        return []
+    StoredImage.objects.bulk_create(
+        (StoredImage(name=name) for name in deltas), ignore_conflicts=True,
+    )
+    with transaction.atomic(savepoint=False):
+        list(StoredImage.objects.select_for_update().filter(
+            name__in=deltas
+        ).order_by('name').values_list('id', flat=True))
+        for name in sorted(deltas):
+            StoredImage.objects.filter(name=name).update(
+                references=F('references') + deltas[name]
+            )
+    released = [name for name, delta in deltas.items() if delta < 0]
+    if not released:
+        return []
+    return list(StoredImage.objects.filter(
+        name__in=released, references__lte=0,
+    ).values_list('name', flat=True))
+
+
+@transaction.atomic
+def delete_files(name):
+    """Удаление файла и его производных, если на него нет ссылок.
+
+    Число ссылок проверяется под блокировкой строки файла: пока она
+    держится, новые ссылки (change_references) и повторное сохранение
+    того же содержимого (ContentAddressedStorage) ждут.
+    """
+    stored = StoredImage.objects.select_for_update().filter(
+        name=name
+    ).first()
+    if (
+        (stored is not None and stored.references > 0)
+        or Recipe.objects.filter(image=name).exists()
+    ):
+        return
+    folder = derivative_dir(name)
+    if default_storage.exists(folder):
+        for file_name in default_storage.listdir(folder)[1]:
+            default_storage.delete(posixpath.join(folder, file_name))
+    image_storage.delete(name)
+    if stored is not None:
+        stored.delete()
@@ -0,0 +1,24 @@
+from api.utils.versions import RECIPES, bump_versions, recipe_key
+from jobs.queue import enqueue, register
+from . import images
+
+
+@register('recipe.image_derivatives')
+def generate_image_derivatives(name, force=False):
+    if not images.image_storage.exists(name):
+        return
+    recipe_ids = images.update_recipes(name, force)
+    if recipe_ids:
+        bump_versions([recipe_key(pk) for pk in recipe_ids] + [RECIPES])
+
+
+def enqueue_image_derivatives(name, force=False):
+    enqueue(
+        'recipe.image_derivatives', key=f'image:{name}', name=name,
+        force=force,
+    )
+
+
+@register('recipe.delete_image')
+def delete_image(name):
+    images.delete_files(name)
@@ -0,0 +1,153 @@
+import posixpath
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.utils.versions import RECIPES, bump_versions, recipe_key
+from recipe import images
+from recipe.jobs import enqueue_image_derivatives
+from recipe.models import Recipe, StoredImage
+from recipe.storage import hashed_name
+
+HASHED_NAME = re.compile(r'/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+DERIVATIVES = 'derivatives'
+
+
+class Command(BaseCommand):
+    help = (
+        'Перенос изображений рецептов в хранилище с именами по хешу '
+        'содержимого: одинаковые файлы остаются в одном экземпляре.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать дубликаты, ничего не меняя.',
+        )
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help=(
+                'Файлы без ссылок удаляются, если они старше стольких '
+                'часов: только что загруженный файл ещё ждёт рецепт.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        storage = images.image_storage
+        names = list(
+            Recipe.objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct()
+        )
+        targets = set(name for name in names if HASHED_NAME.search(name))
+        moved = duplicates = saved = 0
+        for name in names:
+            if HASHED_NAME.search(name):
+                continue
+            if not storage.exists(name):
+                self.stderr.write(f'{name}: файл не найден')
+                continue
+            size = storage.size(name)
+            with storage.open(name) as file:
+                target = hashed_name(name, file)
+                exists = target in targets or storage.exists(target)
+                if not options['dry_run']:
+                    storage.save(name, file)
+            if not options['dry_run']:
+                self.move(name, target)
+            if exists:
+                duplicates += 1
+                saved += size
+            targets.add(target)
+            moved += 1
+        # Счётчики исправляются до обхода: файл с завышенным счётчиком
+        # ссылок delete_files не удалит.
+        drift = self.reconcile(options['dry_run'])
+        orphans, orphans_size = self.sweep(
+            options['min_age'], options['dry_run'],
+        )
+        saved += orphans_size
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, дубликатов: {duplicates}, '
+            f'без ссылок: {orphans}, '
+            f'освобождено {saved / 2 ** 20:.1f} МБ, '
+            f'исправлено счётчиков ссылок: {drift}'
+        ))
+
+    def sweep(self, min_age, dry_run):
+        """Удаление файлов каталога изображений, на которые нет ссылок.
+
+        Обходит каталог upload_to поля image вместе с подкаталогами
+        хешей, а не только имена из рецептов: так находятся файлы,
+        оставшиеся от удалённых и незавершённых загрузок. Возвращает
+        число удалённых файлов и их размер.
+        """
+        storage = images.image_storage
+        referenced = set(
+            Recipe.objects.exclude(image='')
+            .values_list('image', flat=True).distinct()
+        )
+        deadline = timezone.now() - timedelta(hours=min_age)
+        removed = size = 0
+        for name in self.walk(Recipe._meta.get_field('image').upload_to):
+            if (
+                name in referenced
+                or storage.get_modified_time(name) > deadline
+            ):
+                continue
+            file_size = storage.size(name)
+            if not dry_run:
+                # Ссылки перепроверяются под блокировкой строки файла.
+                images.delete_files(name)
+                if storage.exists(name):
+                    continue
+            removed += 1
+            size += file_size
+        return removed, size
+
+    @staticmethod
+    def walk(folder):
+        """Имена файлов изображений в folder и его подкаталогах."""
+        storage = images.image_storage
+        if not storage.exists(folder):
+            return
+        folders, files = storage.listdir(folder)
+        for file_name in sorted(files):
+            yield posixpath.join(folder, file_name)
+        for name in sorted(folders):
+            if name != DERIVATIVES:
+                yield from Command.walk(posixpath.join(folder, name))
+
+    @staticmethod
+    @transaction.atomic
+    def move(name, target):
+        recipes = Recipe.objects.filter(image=name)
+        recipe_ids = list(recipes.values_list('id', flat=True))
+        recipes.update(image=target, image_width=None)
+        images.change_references(
+            {name: -len(recipe_ids), target: len(recipe_ids)}
+        )
+        images.delete_files(name)
+        enqueue_image_derivatives(target)
+        bump_versions([recipe_key(pk) for pk in recipe_ids] + [RECIPES])
+
+    @staticmethod
+    def reconcile(dry_run):
+        """Сверка счётчиков ссылок с рецептами, возвращает расхождения."""
+        actual = dict(
+            Recipe.objects.exclude(image='').values_list('image')
+            .annotate(references=Count('id')).order_by()
+        )
+        stored = dict(StoredImage.objects.values_list('name', 'references'))
+        deltas = {
+            name: actual.get(name, 0) - stored.get(name, 0)
+            for name in actual.keys() | stored.keys()
+        }
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if deltas and not dry_run:
+            with transaction.atomic():
+                images.change_references(deltas)
+        return len(deltas)
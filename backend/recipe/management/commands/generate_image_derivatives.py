@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from PIL import UnidentifiedImageError
+
+from recipe.jobs import enqueue_image_derivatives, generate_image_derivatives
+from recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание производных изображений для существующих рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать производные, даже если они уже есть.',
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Поставить задачи в очередь вместо выполнения на месте.',
+        )
+
+    def handle(self, *args, **options):
+        names = (
+            Recipe.objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct()
+        )
+        processed = failed = 0
+        for name in names.iterator():
+            if options['enqueue']:
+                enqueue_image_derivatives(name, options['force'])
+                processed += 1
+                continue
+            try:
+                generate_image_derivatives(name, options['force'])
+            except (OSError, UnidentifiedImageError) as error:
+                failed += 1
+                self.stderr.write(f'{name}: {error}')
+                continue
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {processed}, ошибок: {failed}'
+        ))
@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.utils.versions import CATALOG, bump_versions
+from recipe.models import Ingredients, Tag
+
+JSON_LINES_SUFFIXES = ('.jsonl', '.ndjson')
+INGREDIENT_FIELDS = ('name', 'measurement_unit')
+TAG_FIELDS = ('name', 'color', 'slug')
+
+
+def read_rows(path, fields):
+    """Построчное чтение csv или json-lines без загрузки файла в память."""
+    with open(path, encoding='utf-8') as file:
+        if Path(path).suffix in JSON_LINES_SUFFIXES:
+            for line in file:
+                if line.strip():
+                    item = json.loads(line)
+                    yield tuple(str(item[field]).strip() for field in fields)
+            return
+        for row in csv.reader(file):
+            if row and row[0].strip():
+                yield tuple(value.strip() for value in row[:len(fields)])
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Загрузка каталога тегов и ингредиентов пачками с повторяемой '
+        'вставкой-обновлением; на PostgreSQL ингредиенты грузятся через COPY.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients', default='data/ingredients.csv',
+            help='csv или json-lines; пустая строка — пропустить.',
+        )
+        parser.add_argument(
+            '--tags', default='data/tags.csv',
+            help='csv или json-lines; пустая строка — пропустить.',
+        )
+        parser.add_argument(
+            '--recipes', default=None,
+            help='Необязательная фикстура рецептов для loaddata.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.',
+        )
+
+    def handle(self, *args, **options):
+        for option in ('ingredients', 'tags', 'recipes'):
+            path = options[option]
+            if path and not Path(path).exists():
+                raise CommandError(f'Файл {path} не найден.')
+
+        if options['tags']:
+            self.load(
+                'Теги', read_rows(options['tags'], TAG_FIELDS),
+                self.upsert_tags, options['batch_size'],
+            )
+        if options['ingredients']:
+            use_copy = (
+                connection.vendor == 'postgresql' and not options['no_copy']
+            )
+            self.load(
+                'Ингредиенты',
+                read_rows(options['ingredients'], INGREDIENT_FIELDS),
+                self.copy_ingredients if use_copy
+                else self.upsert_ingredients,
+                options['batch_size'],
+            )
+        bump_versions((CATALOG,))
+        if options['recipes']:
+            call_command('loaddata', options['recipes'])
+
+    def load(self, title, rows, upsert, batch_size):
+        total = 0
+        start = time.perf_counter()
+        for batch in batches(rows, batch_size):
+            with transaction.atomic():
+                upsert(batch)
+            total += len(batch)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{title}: {total} строк, '
+                f'{total / elapsed if elapsed else 0:.0f} строк/с'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{title}: загружено {total} строк '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
+
+    @staticmethod
+    def upsert_ingredients(batch):
+        units = dict(batch)
+        Ingredients.objects.bulk_create(
+            (
+                Ingredients(name=name, measurement_unit=unit)
+                for name, unit in units.items()
+            ),
+            ignore_conflicts=True,
+        )
+        changed = []
+        for ingredient in Ingredients.objects.filter(name__in=units):
+            if ingredient.measurement_unit != units[ingredient.name]:
+                ingredient.measurement_unit = units[ingredient.name]
+                changed.append(ingredient)
+        Ingredients.objects.bulk_update(changed, ('measurement_unit',))
+
+    @staticmethod
+    def copy_ingredients(batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        table = Ingredients._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredients_load '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                'COPY ingredients_load FROM STDIN WITH (FORMAT csv)', buffer,
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT DISTINCT ON (name) name, measurement_unit '
+                f'FROM ingredients_load '
+                f'ON CONFLICT (name) DO UPDATE '
+                f'SET measurement_unit = EXCLUDED.measurement_unit '
+                f'WHERE {table}.measurement_unit '
+                f'IS DISTINCT FROM EXCLUDED.measurement_unit'
+            )
+
+    @staticmethod
+    def upsert_tags(batch):
+        tags = {slug: (name, color) for name, color, slug in batch}
+        new = tags.keys() - set(
+            Tag.objects.filter(slug__in=tags).values_list('slug', flat=True)
+        )
+        try:
+            bits = Tag.free_bits(len(new))
+        except ValidationError as error:
+            raise CommandError(error.messages[0])
+        Tag.objects.bulk_create(
+            (
+                Tag(
+                    name=tags[slug][0], color=tags[slug][1], slug=slug,
+                    bit=bit,
+                )
+                for slug, bit in zip(sorted(new), bits)
+            ),
+            ignore_conflicts=True,
+        )
+        changed = []
+        for tag in Tag.objects.filter(slug__in=tags):
+            if (tag.name, tag.color) != tags[tag.slug]:
+                tag.name, tag.color = tags[tag.slug]
+                changed.append(tag)
+        Tag.objects.bulk_update(changed, ('name', 'color'))
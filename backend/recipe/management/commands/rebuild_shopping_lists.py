@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipe import shopping_lists
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка списков покупок по корзинам пользователей: '
+        'отчёт о расхождениях и пересборка.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.order_by('id').values_list(
+            'id', flat=True
+        ))
+        size = options['batch_size']
+        drift = 0
+        for start in range(0, len(user_ids), size):
+            with transaction.atomic():
+                drift += shopping_lists.rebuild(
+                    user_ids[start:start + size], dry_run=options['dry_run'],
+                )
+        message = f'Расхождений в списках покупок: {drift}'
+        if drift and not options['dry_run']:
+            message += ', списки пересобраны'
+        self.stdout.write(
+            self.style.WARNING(message) if drift
+            else self.style.SUCCESS(message)
+        )
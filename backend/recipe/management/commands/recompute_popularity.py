@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.utils.versions import POPULARITY, bump_versions
+from recipe import popularity
+from recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Полный пересчёт оценок популярности рецептов по избранному '
+        'и корзинам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        size = options['batch_size']
+        for start in range(0, len(ids), size):
+            with transaction.atomic():
+                popularity.recompute(ids[start:start + size])
+        bump_versions((POPULARITY,))
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано рецептов: {len(ids)}')
+        )
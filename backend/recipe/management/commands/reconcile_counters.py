@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipe import counters
+from recipe.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка счётчиков избранного, корзин, рецептов и подписчиков '
+        'с данными и исправление расхождений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        drift = 0
+        for model, reconcile in (
+            (Recipe, counters.reconcile_recipes),
+            (User, counters.reconcile_users),
+        ):
+            ids = list(
+                model.objects.order_by('pk').values_list('pk', flat=True)
+            )
+            size = options['batch_size']
+            for start in range(0, len(ids), size):
+                with transaction.atomic():
+                    drift += reconcile(
+                        ids[start:start + size], dry_run=options['dry_run'],
+                    )
+        message = f'Строк с неверными счётчиками: {drift}'
+        if drift and not options['dry_run']:
+            message += ', счётчики исправлены'
+        self.stdout.write(
+            self.style.WARNING(message) if drift
+            else self.style.SUCCESS(message)
+        )
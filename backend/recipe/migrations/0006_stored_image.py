@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:24
+
+from django.db import migrations, models
+import recipe.storage
+
+
+def count_references(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    StoredImage = apps.get_model('recipe', 'StoredImage')
+    StoredImage.objects.bulk_create(
+        (
+            StoredImage(name=name, references=references)
+            for name, references in (
+                Recipe.objects.exclude(image='')
+                .values_list('image')
+                .annotate(references=models.Count('id'))
+                .order_by()
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_recipe_image_width'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='Файл')),
+                ('references', models.IntegerField(default=0, verbose_name='Ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipe.storage.ContentAddressedStorage(), upload_to='recipe/image', verbose_name='Изображение'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
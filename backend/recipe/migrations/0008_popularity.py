@@ -0,0 +1,56 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_popularity(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    RecipePopularity = apps.get_model('recipe', 'RecipePopularity')
+    RecipePopularity.objects.bulk_create(
+        (
+            RecipePopularity(recipe_id=pk)
+            for pk in Recipe.objects.values_list('pk', flat=True).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RecipePopularity',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='recipe.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+                'db_table': 'recipes_recipe_popularity',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipepopularity',
+            index=models.Index(fields=['-score', '-recipe'], name='recipe_popularity_score'),
+        ),
+        migrations.RunPython(create_popularity, migrations.RunPython.noop),
+    ]
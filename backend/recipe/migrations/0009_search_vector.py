@@ -0,0 +1,61 @@
+from django.db import migrations
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(new.name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(new.text, '')), 'B')"
+)
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE recipe_recipe ADD COLUMN search_vector tsvector'
+    )
+    schema_editor.execute(
+        'CREATE FUNCTION recipe_search_vector() RETURNS trigger AS $$ '
+        f'BEGIN new.search_vector := {SEARCH_VECTOR}; RETURN new; END '
+        '$$ LANGUAGE plpgsql'
+    )
+    schema_editor.execute(
+        'CREATE TRIGGER recipe_search_vector '
+        'BEFORE INSERT OR UPDATE OF name, text ON recipe_recipe '
+        'FOR EACH ROW EXECUTE FUNCTION recipe_search_vector()'
+    )
+    schema_editor.execute(
+        'UPDATE recipe_recipe SET search_vector = '
+        + SEARCH_VECTOR.replace('new.', '')
+    )
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_vector_gin '
+        'ON recipe_recipe USING gin (search_vector)'
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP TRIGGER recipe_search_vector ON recipe_recipe'
+    )
+    schema_editor.execute('DROP FUNCTION recipe_search_vector()')
+    schema_editor.execute(
+        'ALTER TABLE recipe_recipe DROP COLUMN search_vector'
+    )
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс рецептов для PostgreSQL.
+
+    Колонка tsvector заполняется триггером при любой записи названия
+    или описания. В SQLite её роль играет таблица FTS5, которую
+    создаёт recipe.search.install_sqlite после миграций.
+    """
+
+    dependencies = [
+        ('recipe', '0008_popularity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
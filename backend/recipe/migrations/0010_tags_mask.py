@@ -0,0 +1,53 @@
+# Generated by Django 3.2.3 on 2026-10-18 22:10
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_masks(apps, schema_editor):
+    Tag = apps.get_model('recipe', 'Tag')
+    Recipe = apps.get_model('recipe', 'Recipe')
+    tags = list(Tag.objects.order_by('id'))
+    for bit, tag in enumerate(tags):
+        tag.bit = bit
+    Tag.objects.bulk_update(tags, ['bit'])
+    masks = defaultdict(int)
+    for recipe_id, bit in Recipe.tags.through.objects.values_list(
+        'recipe_id', 'tag__bit'
+    ).iterator():
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        (
+            Recipe(id=pk, tags_mask=mask)
+            for pk, mask in masks.items()
+        ),
+        ['tags_mask'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, null=True, verbose_name='Бит в маске тегов'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.RunPython(fill_masks, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(editable=False, unique=True, verbose_name='Бит в маске тегов'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:13
+
+import math
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def to_log_score(apps, schema_editor):
+    RecipePopularity = apps.get_model('recipe', 'RecipePopularity')
+    rows = []
+    for row in RecipePopularity.objects.iterator(chunk_size=BATCH_SIZE):
+        row.score = math.log2(row.score) if row.score > 0 else float('-inf')
+        rows.append(row)
+        if len(rows) == BATCH_SIZE:
+            RecipePopularity.objects.bulk_update(rows, ['score'])
+            rows = []
+    RecipePopularity.objects.bulk_update(rows, ['score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipepopularity',
+            name='score',
+            field=models.FloatField(default=float("-inf"), help_text='Двоичный логарифм суммы весов.', verbose_name='Популярность'),
+        ),
+        migrations.RunPython(to_log_score, migrations.RunPython.noop),
+    ]
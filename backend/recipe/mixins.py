@@ -0,0 +1,31 @@
+class DerivedFieldsMixin:
+    """Поля, которые ведутся UPDATE с F() в обход save().
+
+    Экземпляр, загруженный до такого UPDATE, при полном save() записал
+    бы старые значения поверх актуальных. Поэтому save() существующей
+    строки без явного update_fields пишет все загруженные поля, кроме
+    derived_fields. Новые строки вставляются целиком.
+    """
+
+    derived_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if update_fields is None and not force_insert and not (
+            self._state.adding
+        ):
+            update_fields = self.ordinary_fields()
+        super().save(
+            force_insert=force_insert, force_update=force_update,
+            using=using, update_fields=update_fields,
+        )
+
+    def ordinary_fields(self):
+        skipped = self.get_deferred_fields() | {
+            self._meta.get_field(name).attname
+            for name in self.derived_fields
+        }
+        return [
+            field.attname for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in skipped
+        ]
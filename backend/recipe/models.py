@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
 
 from foodgram.constants import (
     MAX_FIELD_LENGTH, MIN_VALUE, MIN_VALUE_MSG,
-    MAX_COLOR_LENGHT, MAX_INFO_LENGTH
+    MAX_COLOR_LENGHT, MAX_INFO_LENGTH, MAX_TAGS, POPULARITY_EMPTY_SCORE,
 )
+from .mixins import DerivedFieldsMixin
+from .storage import ContentAddressedStorage
 from .validators import color_validator
 
 User = get_user_model()
@@ -49,6 +52,11 @@ class Tag(models.Model):
         unique=True,
         validators=[color_validator]
     )
+    bit = models.PositiveSmallIntegerField(
+        verbose_name='Бит в маске тегов',
+        unique=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -58,13 +66,30 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit, = self.free_bits(1)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def free_bits(amount):
+        """Первые amount свободных битов маски тегов."""
+        used = set(Tag.objects.values_list('bit', flat=True))
+        free = [bit for bit in range(MAX_TAGS) if bit not in used][:amount]
+        if len(free) < amount:
+            raise ValidationError(
+                f'Превышено максимальное число тегов: {MAX_TAGS}.'
+            )
+        return free
+
 
-class Recipe(models.Model):
+class Recipe(DerivedFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор',
-        related_name='recipes'
+        related_name='recipes',
+        db_index=False,
     )
     name = models.CharField(
         verbose_name='Название',
@@ -72,7 +97,14 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         verbose_name='Изображение',
-        upload_to='recipe/image'
+        upload_to='recipe/image',
+        storage=ContentAddressedStorage(),
+    )
+    image_width = models.PositiveIntegerField(
+        verbose_name='Ширина изображения',
+        null=True,
+        blank=True,
+        editable=False,
     )
     text = models.TextField(
         verbose_name='Описание'
@@ -92,16 +124,46 @@ class Recipe(models.Model):
         verbose_name='Время приготовления',
         validators=[MinValueValidator(MIN_VALUE, MIN_VALUE_MSG)],
     )
+    tags_mask = models.BigIntegerField(
+        verbose_name='Маска тегов',
+        default=0,
+        db_index=True,
+        editable=False,
+    )
+    favorites_count = models.IntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    carts_count = models.IntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    # Ведутся сигналами, заданием производных изображения и tag_masks.
+    derived_fields = (
+        'image_width', 'tags_mask', 'favorites_count', 'carts_count',
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['author', '-id'], name='recipe_author_id'),
+        ]
 
     def __str__(self):
         info_string = f'{self.author} - {self.name}'
         return info_string[:MAX_INFO_LENGTH]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Имя файла при загрузке нужно для учёта ссылок на изображения.
+        instance.loaded_image = instance.__dict__.get('image')
+        return instance
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -109,6 +171,7 @@ class RecipeIngredient(models.Model):
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
         related_name='recipe_ingredients',
+        db_index=False,
     )
     ingredient = models.ForeignKey(
         Ingredients,
@@ -125,6 +188,12 @@ class RecipeIngredient(models.Model):
         verbose_name = 'Ингредиент в рецепте'
         verbose_name_plural = 'Ингредиенты в рецептах'
         db_table = 'recipes_recipe_ingredient'
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='recipe_ingredient_recipe',
+            ),
+        ]
 
     def __str__(self):
         return (
@@ -140,13 +209,19 @@ class ShoppingCart(models.Model):
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE,
-        related_name='carts'
+        related_name='carts',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
-        related_name='carts'
+        related_name='carts',
+        db_index=False,
+    )
+    created = models.DateTimeField(
+        verbose_name='Добавлено',
+        auto_now_add=True,
     )
 
     class Meta:
@@ -160,6 +235,12 @@ class ShoppingCart(models.Model):
                 name='unique_user_cart',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user', 'created'],
+                name='shopping_cart_recipe_user',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
@@ -170,13 +251,19 @@ class Favorite(models.Model):
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE,
-        related_name='favorites'
+        related_name='favorites',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
         verbose_name='Рецепт',
         on_delete=models.CASCADE,
-        related_name='favorites'
+        related_name='favorites',
+        db_index=False,
+    )
+    created = models.DateTimeField(
+        verbose_name='Добавлено',
+        auto_now_add=True,
     )
 
     class Meta:
@@ -189,6 +276,115 @@ class Favorite(models.Model):
                 name='unique_user_favorite',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['recipe', 'user', 'created'],
+                name='favorite_recipe_user',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list'
+    )
+    ingredient = models.ForeignKey(
+        Ingredients,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items'
+    )
+    amount = models.IntegerField(
+        verbose_name='Количество',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        db_table = 'recipes_shopping_list_item'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_user_shopping_list_ingredient',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient}: {self.amount}'
+
+
+class DataVersion(models.Model):
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=MAX_FIELD_LENGTH,
+        unique=True,
+    )
+    version = models.PositiveBigIntegerField(
+        verbose_name='Версия',
+        default=0,
+    )
+    modified = models.DateTimeField(
+        verbose_name='Изменено',
+    )
+
+    class Meta:
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.key} - {self.version}'
+
+
+class StoredImage(models.Model):
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=MAX_FIELD_LENGTH,
+        unique=True,
+    )
+    references = models.IntegerField(
+        verbose_name='Ссылок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self):
+        return f'{self.name} - {self.references}'
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity'
+    )
+    score = models.FloatField(
+        verbose_name='Популярность',
+        default=POPULARITY_EMPTY_SCORE,
+        help_text='Двоичный логарифм суммы весов.',
+    )
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        db_table = 'recipes_recipe_popularity'
+        indexes = [
+            models.Index(
+                fields=['-score', '-recipe'],
+                name='recipe_popularity_score',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} - {self.score}'
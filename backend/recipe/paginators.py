@@ -0,0 +1,36 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from foodgram.constants import ADMIN_EXACT_COUNT_LIMIT
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки без COUNT(*) по всей большой таблице.
+
+    Для списка без фильтров и поиска PostgreSQL отдаёт оценку числа
+    строк из статистики pg_class. Точный COUNT(*) остаётся для
+    небольших таблиц, отфильтрованных списков и других СУБД.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = self.estimate(self.object_list)
+            if estimate is not None and estimate >= ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
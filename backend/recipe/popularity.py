@@ -0,0 +1,107 @@
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from foodgram.constants import (
+    POPULARITY_CART_WEIGHT, POPULARITY_EMPTY_SCORE, POPULARITY_EPOCH,
+    POPULARITY_FAVORITE_WEIGHT, POPULARITY_REMAINDER,
+)
+from .models import Favorite, RecipePopularity, ShoppingCart
+
+WEIGHTS = {
+    Favorite: POPULARITY_FAVORITE_WEIGHT,
+    ShoppingCart: POPULARITY_CART_WEIGHT,
+}
+
+
+def log_weight(model, created):
+    """Двоичный логарифм вклада строки избранного или корзины.
+
+    Вместо того чтобы со временем уменьшать все оценки, каждое новое
+    событие получает вес, растущий как 2 ** (t / период полураспада)
+    от POPULARITY_EPOCH. Порядок рецептов совпадает с порядком по
+    затухающей сумме, а старые оценки не нужно переписывать. Сам вес
+    за тысячу периодов вышел бы за пределы float, поэтому оценка
+    хранится как log2 суммы весов: показатель растёт линейно.
+    """
+    half_life = settings.POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60
+    age = (created - POPULARITY_EPOCH).total_seconds()
+    return math.log2(WEIGHTS[model]) + age / half_life
+
+
+def log_add(score, value):
+    """log2(2 ** score + 2 ** value) без вычисления самих степеней."""
+    high, low = max(score, value), min(score, value)
+    return high + math.log1p(2 ** (low - high)) / math.log(2)
+
+
+def log_subtract(score, value):
+    """log2(2 ** score - 2 ** value).
+
+    Если остаток меньше точности оценки, у рецепта больше нет весомых
+    событий, и оценка становится пустой.
+    """
+    ratio = 2 ** (value - score)
+    if ratio > 1 - POPULARITY_REMAINDER:
+        return POPULARITY_EMPTY_SCORE
+    return score + math.log1p(-ratio) / math.log(2)
+
+
+def create(recipe_ids):
+    """Пустые оценки для новых рецептов."""
+    RecipePopularity.objects.bulk_create(
+        (RecipePopularity(recipe_id=pk) for pk in recipe_ids),
+        ignore_conflicts=True,
+    )
+
+
+def change(instance, sign):
+    """Оценка пересчитывается в Python под блокировкой строки рецепта."""
+    value = log_weight(type(instance), instance.created)
+    with transaction.atomic(savepoint=False):
+        row = RecipePopularity.objects.select_for_update().filter(
+            recipe_id=instance.recipe_id
+        ).first()
+        if row is None:
+            return
+        if sign > 0:
+            row.score = log_add(row.score, value)
+        else:
+            row.score = log_subtract(row.score, value)
+        row.save(update_fields=['score'])
+
+
+def add(instance):
+    change(instance, 1)
+
+
+def remove(instance):
+    change(instance, -1)
+
+
+def recompute(recipe_ids):
+    """Полный пересчёт оценок рецептов по избранному и корзинам."""
+    recipe_ids = list(recipe_ids)
+    values = defaultdict(list)
+    for model in WEIGHTS:
+        for recipe_id, created in model.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'created').order_by():
+            values[recipe_id].append(log_weight(model, created))
+    create(recipe_ids)
+    RecipePopularity.objects.bulk_update(
+        (
+            RecipePopularity(recipe_id=pk, score=log_sum(values[pk]))
+            for pk in recipe_ids
+        ),
+        ['score'],
+    )
+
+
+def log_sum(values):
+    if not values:
+        return POPULARITY_EMPTY_SCORE
+    high = max(values)
+    return high + math.log2(sum(2 ** (value - high) for value in values))
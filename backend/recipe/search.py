@@ -0,0 +1,106 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Recipe
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'recipe_search'
+FTS_WEIGHTS = (10.0, 1.0)
+WORD_PATTERN = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = {
+    'recipe_search_insert': (
+        'AFTER INSERT ON {recipes} BEGIN '
+        'INSERT INTO {fts}(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+    'recipe_search_delete': (
+        'AFTER DELETE ON {recipes} BEGIN '
+        "INSERT INTO {fts}({fts}, rowid, name, text) "
+        "VALUES ('delete', old.id, old.name, old.text); END"
+    ),
+    'recipe_search_update': (
+        'AFTER UPDATE OF name, text ON {recipes} BEGIN '
+        "INSERT INTO {fts}({fts}, rowid, name, text) "
+        "VALUES ('delete', old.id, old.name, old.text); "
+        'INSERT INTO {fts}(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); END'
+    ),
+}
+
+
+def install_sqlite(connection):
+    """Таблица FTS5 с триггерами для SQLite-конфигурации.
+
+    SQLite пересоздаёт таблицу рецептов при изменении её схемы и теряет
+    триггеры, поэтому они восстанавливаются после каждой миграции, а
+    индекс в этом случае перестраивается целиком.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    names = {'recipes': Recipe._meta.db_table, 'fts': FTS_TABLE}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if existing >= SQLITE_TRIGGERS.keys():
+            return
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+            "name, text, content='{recipes}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')".format(**names)
+        )
+        for name, body in SQLITE_TRIGGERS.items():
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {name} '
+                + body.format(**names)
+            )
+        cursor.execute(
+            "INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(**names)
+        )
+
+
+def fts_query(value):
+    """Запрос FTS5: каждое слово ищется как префикс."""
+    return ' '.join(
+        f'"{word}"*' for word in WORD_PATTERN.findall(value.lower())
+    )
+
+
+def search(queryset, value):
+    """Рецепты, подходящие под запрос, по убыванию релевантности.
+
+    Релевантность сохраняется в поле search_rank; в SQLite bm25
+    доступен только при соединении с таблицей FTS5, отсюда extra().
+    """
+    recipes = Recipe._meta.db_table
+    if connections[queryset.db].vendor == 'postgresql':
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(
+            f'{recipes}.search_vector @@ {query}', (value,),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f'ts_rank({recipes}.search_vector, {query})', (value,),
+            output_field=FloatField(),
+        )
+        queryset = queryset.filter(matches).annotate(search_rank=rank)
+    else:
+        value = fts_query(value)
+        if not value:
+            return queryset.none()
+        weights = ', '.join(map(str, FTS_WEIGHTS))
+        queryset = queryset.extra(
+            select={'search_rank': f'-bm25({FTS_TABLE}, {weights})'},
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = {recipes}.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[value],
+        )
+    return queryset.order_by('-search_rank', '-id')
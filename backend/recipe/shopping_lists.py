@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+from threading import local
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import Recipe, RecipeIngredient, ShoppingCart, ShoppingListItem
+
+_removals = local()
+
+
+def get_amounts(recipe_id):
+    """Количество каждого ингредиента в рецепте."""
+    amounts = Counter()
+    for ingredient_id, amount in RecipeIngredient.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredient_id', 'amount'):
+        amounts[ingredient_id] += amount
+    return amounts
+
+
+def lock_amounts(recipe_id):
+    """Количество ингредиентов рецепта под блокировкой его строки.
+
+    Блокировка держится до конца транзакции. Другое изменение рецепта
+    и добавление его в корзину (оно меняет carts_count той же строки)
+    ждут её, поэтому разница между старым и новым составом рецепта
+    доходит до всех списков покупок ровно один раз.
+    """
+    list(Recipe.objects.select_for_update().filter(pk=recipe_id).values('pk'))
+    return get_amounts(recipe_id)
+
+
+def apply_deltas(user_ids, deltas):
+    """Изменение сумм в списках покупок пользователей на deltas."""
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    user_ids = list(user_ids)
+    if not user_ids or not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id in deltas
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas,
+    )
+    items.update(amount=F('amount') + Case(
+        *(
+            When(ingredient_id=pk, then=Value(delta))
+            for pk, delta in deltas.items()
+        ),
+        output_field=IntegerField(),
+    ))
+    if min(deltas.values()) < 0:
+        items.filter(amount__lte=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    apply_deltas((user_id,), get_amounts(recipe_id))
+
+
+def defer_removal(user_id, recipe_id):
+    """Отложенное удаление рецепта из списка покупок пользователя.
+
+    При каскадном удалении рецепта или пользователя Django шлёт
+    pre_delete каждой корзины раньше, чем pre_delete самого рецепта
+    или пользователя. Корзины копятся здесь до flush_removals, который
+    вычитает их все сразу.
+    """
+    if not hasattr(_removals, 'pairs'):
+        _removals.pairs = []
+    _removals.pairs.append((user_id, recipe_id))
+
+
+def flush_removals(skip_user_id=None):
+    """Вычитание отложенных корзин из списков покупок.
+
+    Состав всех рецептов читается одним запросом, а пользователи с
+    одинаковыми изменениями обновляются одним apply_deltas: удаление
+    рецепта из тысячи корзин стоит несколько запросов, а не тысячи.
+    Списки skip_user_id не трогаются: они удаляются вместе с ним.
+    """
+    pairs = getattr(_removals, 'pairs', None)
+    if not pairs:
+        return
+    _removals.pairs = []
+    amounts = defaultdict(Counter)
+    for recipe_id, ingredient_id, amount in RecipeIngredient.objects.filter(
+        recipe_id__in={recipe_id for _, recipe_id in pairs}
+    ).values_list('recipe_id', 'ingredient_id', 'amount'):
+        amounts[recipe_id][ingredient_id] += amount
+    deltas = defaultdict(Counter)
+    for user_id, recipe_id in pairs:
+        if user_id != skip_user_id:
+            deltas[user_id].subtract(amounts[recipe_id])
+    groups = defaultdict(list)
+    for user_id, user_deltas in deltas.items():
+        groups[frozenset(user_deltas.items())].append(user_id)
+    for user_deltas, user_ids in groups.items():
+        apply_deltas(user_ids, dict(user_deltas))
+
+
+def update_recipe(recipe_id, old_amounts):
+    """Перенос изменения ингредиентов рецепта в списки покупок."""
+    deltas = get_amounts(recipe_id)
+    deltas.subtract(old_amounts)
+    apply_deltas(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        ),
+        deltas,
+    )
+
+
+def calculate(user_ids):
+    """Списки покупок, посчитанные заново по корзинам."""
+    totals = defaultdict(dict)
+    for user_id, ingredient_id, amount in (
+        RecipeIngredient.objects.filter(recipe__carts__user_id__in=user_ids)
+        .values_list('recipe__carts__user_id', 'ingredient_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    ):
+        totals[user_id][ingredient_id] = amount
+    return totals
+
+
+def rebuild(user_ids, dry_run=False):
+    """Пересборка списков покупок; возвращает число расхождений."""
+    expected = calculate(user_ids)
+    stored = defaultdict(dict)
+    for user_id, ingredient_id, amount in ShoppingListItem.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'ingredient_id', 'amount'):
+        stored[user_id][ingredient_id] = amount
+    drift = sum(
+        expected[user_id].get(pk) != stored[user_id].get(pk)
+        for user_id in user_ids
+        for pk in expected[user_id].keys() | stored[user_id].keys()
+    )
+    if drift and not dry_run:
+        ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount,
+            )
+            for user_id, amounts in expected.items()
+            for ingredient_id, amount in amounts.items()
+        )
+    return drift
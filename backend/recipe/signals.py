@@ -0,0 +1,183 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete,
+)
+from django.dispatch import Signal, receiver
+
+from jobs.queue import enqueue
+from . import (
+    counters, images, popularity, search, shopping_lists, tag_masks,
+)
+from .jobs import enqueue_image_derivatives
+from .models import Favorite, Recipe, ShoppingCart, Tag
+
+User = get_user_model()
+
+# Рецепты вставлены в БД: sender=Recipe, recipes — список с id. Шлётся
+# из post_save для одного рецепта и из пакетного импорта после
+# bulk_create, поэтому всё, что нужно сделать при создании рецепта,
+# подключается сюда, а не к post_save.
+recipes_created = Signal()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(instance, created, **kwargs):
+    if created:
+        # Счётчик меняется первым: UPDATE блокирует строку рецепта, и
+        # состав рецепта читается уже после параллельного изменения.
+        counters.change(Recipe, instance.recipe_id, carts_count=1)
+        shopping_lists.add_recipe(instance.user_id, instance.recipe_id)
+        popularity.add(instance)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(instance, **kwargs):
+    counters.change(Recipe, instance.recipe_id, carts_count=-1)
+    shopping_lists.defer_removal(instance.user_id, instance.recipe_id)
+    popularity.remove(instance)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def flush_shopping_list_removals(**kwargs):
+    shopping_lists.flush_removals()
+
+
+@receiver(pre_delete, sender=Recipe)
+def remove_recipe_from_shopping_lists(**kwargs):
+    # Корзины рецепта получили pre_delete раньше, а состав рецепта
+    # удаляется сразу после pre_delete: вычесть его можно только здесь.
+    shopping_lists.flush_removals()
+
+
+@receiver(pre_delete, sender=User)
+def remove_user_carts(instance, **kwargs):
+    shopping_lists.flush_removals(skip_user_id=instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+def add_to_favorites(instance, created, **kwargs):
+    if created:
+        counters.change(Recipe, instance.recipe_id, favorites_count=1)
+        popularity.add(instance)
+
+
+@receiver(post_delete, sender=Favorite)
+def remove_from_favorites(instance, **kwargs):
+    counters.change(Recipe, instance.recipe_id, favorites_count=-1)
+    popularity.remove(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def send_recipes_created(instance, created, **kwargs):
+    if created:
+        recipes_created.send(sender=Recipe, recipes=[instance])
+
+
+@receiver(recipes_created)
+def add_author_recipes(recipes, **kwargs):
+    authors = Counter(recipe.author_id for recipe in recipes)
+    for author_id, amount in authors.items():
+        counters.change(User, author_id, recipes_count=amount)
+
+
+@receiver(recipes_created)
+def create_recipe_popularity(recipes, **kwargs):
+    popularity.create(recipe.id for recipe in recipes)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_author_recipe(instance, **kwargs):
+    counters.change(User, instance.author_id, recipes_count=-1)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def sync_tags_mask(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        mask = 1 << instance.bit
+        recipes = Recipe.objects.all()
+        if pk_set is not None:
+            recipes = recipes.filter(pk__in=pk_set)
+    elif pk_set is None:
+        instance.tags_mask = 0
+        Recipe.objects.filter(pk=instance.id).update(tags_mask=0)
+        return
+    else:
+        mask = tag_masks.tag_bits.mask(pk_set)
+        recipes = Recipe.objects.filter(pk=instance.id)
+        if action == 'post_add':
+            instance.tags_mask |= mask
+        else:
+            instance.tags_mask &= ~mask
+    if not mask:
+        return
+    if action == 'post_add':
+        tag_masks.add(recipes, mask)
+    else:
+        tag_masks.remove(recipes, mask)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_tag_bits(**kwargs):
+    tag_masks.tag_bits.invalidate()
+
+
+@receiver(post_delete, sender=Tag)
+def release_tag_bit(instance, **kwargs):
+    mask = 1 << instance.bit
+    tag_masks.remove(
+        tag_masks.filter_any(Recipe.objects.all(), mask), mask,
+    )
+    tag_masks.tag_bits.invalidate()
+
+
+@receiver(recipes_created)
+def add_image_references(recipes, **kwargs):
+    images.change_references(
+        Counter(recipe.image.name for recipe in recipes)
+    )
+    by_name = {}
+    for recipe in recipes:
+        recipe.loaded_image = recipe.image.name
+        by_name.setdefault(recipe.image.name, recipe)
+    for name, recipe in by_name.items():
+        if images.needs_derivatives(recipe):
+            enqueue_image_derivatives(name)
+
+
+@receiver(post_save, sender=Recipe)
+def generate_image_derivatives(instance, created, **kwargs):
+    if not created and images.needs_derivatives(instance):
+        enqueue_image_derivatives(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def count_image_references(instance, created, **kwargs):
+    name = instance.image.name or None
+    loaded = getattr(instance, 'loaded_image', None)
+    if created or name == loaded:
+        return
+    deltas = Counter({name: 1})
+    deltas[loaded] -= 1
+    release_images(images.change_references(deltas))
+    instance.loaded_image = name
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image(instance, **kwargs):
+    release_images(images.change_references({instance.image.name: -1}))
+
+
+def release_images(names):
+    for name in names:
+        enqueue('recipe.delete_image', key=f'delete:{name}', name=name)
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    if sender.name == 'recipe':
+        search.install_sqlite(connections[using])
@@ -0,0 +1,59 @@
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+
+def file_hash(content):
+    """sha256 файла; готовый хеш потоковой загрузки берётся как есть."""
+    if getattr(content, 'sha256', None):
+        return content.sha256
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, content):
+    """Имя файла по хешу: <каталог>/<2 символа хеша>/<хеш><расширение>."""
+    folder, file_name = posixpath.split(name)
+    content_hash = file_hash(content)
+    extension = posixpath.splitext(file_name)[1].lower()
+    return posixpath.join(
+        folder, content_hash[:2], f'{content_hash}{extension}'
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, именующее файлы по sha256 содержимого.
+
+    Одинаковые файлы хранятся один раз: если файл с таким хешем уже
+    есть, сохранение возвращает его имя без записи на диск. Содержимое
+    по имени никогда не меняется, поэтому URL можно кэшировать навсегда.
+    Сколько рецептов ссылается на файл, учитывает модель StoredImage.
+    Файл без ссылок может как раз удаляться (images.delete_files),
+    поэтому существование файла проверяется под блокировкой его строки
+    StoredImage: удаление либо успевает закончиться, и файл пишется
+    заново, либо ждёт конца транзакции, в которой на файл появится
+    ссылка.
+    """
+
+    def _save(self, name, content):
+        from .models import StoredImage
+
+        name = hashed_name(name, content)
+        if self.exists(name):
+            with transaction.atomic(savepoint=False):
+                StoredImage.objects.select_for_update().filter(
+                    name=name
+                ).first()
+                if self.exists(name):
+                    return name
+        return super()._save(name, content)
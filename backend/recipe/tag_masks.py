@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+
+from foodgram.constants import TAG_MASK_IN_BITS
+from .models import Recipe, Tag
+
+
+class TagBits:
+    """Маски тегов в памяти процесса по id и slug.
+
+    Бит тега не меняется за время его жизни, поэтому карта
+    перестраивается только после сброса сигналами, по истечении ttl
+    или когда в ней не нашёлся запрошенный тег. Сигналы сбрасывают
+    карту только в своём процессе; другие процессы видят новый тег
+    после ttl или при первом запросе с его slug.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._masks = {}
+        self._slugs = []
+        self._universe = 0
+        self._loaded_at = None
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def is_fresh(self):
+        ttl = self.ttl
+        if ttl is None:
+            ttl = settings.TAG_BITS_TTL
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < ttl
+        )
+
+    def load(self):
+        masks = {}
+        slugs = []
+        universe = 0
+        for pk, slug, bit in Tag.objects.values_list('id', 'slug', 'bit'):
+            masks[pk] = masks[slug] = 1 << bit
+            slugs.append(slug)
+            universe |= 1 << bit
+        with self._lock:
+            self._masks, self._slugs = masks, slugs
+            self._universe = universe
+            self._loaded_at = time.monotonic()
+
+    def mask(self, keys):
+        """Маска тегов по их id или slug; KeyError для неизвестных."""
+        if not self.is_fresh():
+            self.load()
+        masks = self._masks
+        if not masks.keys() >= set(keys):
+            self.load()
+            masks = self._masks
+        result = 0
+        for key in keys:
+            result |= masks[key]
+        return result
+
+    def slugs(self):
+        if not self.is_fresh():
+            self.load()
+        return self._slugs
+
+    def universe(self):
+        """Маска всех занятых битов."""
+        if not self.is_fresh():
+            self.load()
+        return self._universe
+
+    def has_slug(self, slug):
+        """Есть ли тег; неизвестный slug перепроверяется по БД."""
+        if slug in self.slugs():
+            return True
+        self.load()
+        return slug in self._slugs
+
+
+tag_bits = TagBits()
+
+
+def submasks(mask):
+    """Все непустые подмаски mask."""
+    submask = mask
+    while submask:
+        yield submask
+        submask = (submask - 1) & mask
+
+
+def filter_any(queryset, mask):
+    """Рецепты, у которых есть хотя бы один тег из mask.
+
+    Пока тегов немного, условие — tags_mask IN (все маски,
+    пересекающиеся с mask), которое обслуживает индекс по tags_mask;
+    занятые биты берутся из кэша tag_bits. Когда тегов больше
+    TAG_MASK_IN_BITS, список масок слишком длинный, а побитовое И
+    индексом не обслуживается, поэтому рецепты выбираются подзапросом
+    по индексу tag_id таблицы связей с тегами.
+    """
+    universe = tag_bits.universe() | mask
+    if bin(universe).count('1') <= TAG_MASK_IN_BITS:
+        return queryset.filter(tags_mask__in=[
+            submask for submask in submasks(universe) if submask & mask
+        ])
+    return queryset.filter(id__in=Recipe.tags.through.objects.filter(
+        tag_id__in=Tag.objects.filter(bit__in=bits(mask)).values('id')
+    ).values('recipe_id'))
+
+
+def bits(mask):
+    return [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+
+def add(recipes, mask):
+    recipes.update(tags_mask=F('tags_mask').bitor(mask))
+
+
+def remove(recipes, mask):
+    recipes.update(tags_mask=F('tags_mask').bitand(~mask))
+
+
+def rebuild(recipe_ids):
+    """Пересчёт масок рецептов по связям с тегами."""
+    recipe_ids = list(recipe_ids)
+    masks = defaultdict(int)
+    for recipe_id, bit in Recipe.tags.through.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'tag__bit'):
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        (Recipe(id=pk, tags_mask=masks[pk]) for pk in recipe_ids),
+        ['tags_mask'],
+    )
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from recipe.paginators import EstimatedCountPaginator
 from .models import Subscribe
 
 User = get_user_model()
@@ -9,14 +10,24 @@ User = get_user_model()
 
 @admin.register(User)
 class CustomUserAdmin(BaseUserAdmin):
-    list_display = ('id', 'username', 'email')
-    search_fields = ('username', 'email')
-    list_filter = ('username', 'email')
+    list_display = (
+        'id', 'username', 'email', 'recipes_count', 'followers_count',
+    )
+    search_fields = ('^username', '=email')
+    list_filter = ('is_staff', 'is_active')
     list_display_links = ('username',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
 
 @admin.register(Subscribe)
 class SubscribeAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'author')
-    search_fields = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = (
+        '^user__username', '=user__email',
+        '^author__username', '=author__email',
+    )
+    autocomplete_fields = ('user', 'author')
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
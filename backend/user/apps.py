@@ -6,3 +6,6 @@ class UserConfig(AppConfig):
     name = 'user'
     verbose_name = 'Пользователь'
     verbose_name_plural = 'Пользователи'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, column):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{column: OuterRef('pk')})
+            .order_by().values(column)
+            .annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('user', 'User')
+    User.objects.update(
+        recipes_count=count_subquery(
+            apps.get_model('recipe', 'Recipe'), 'author'
+        ),
+        followers_count=count_subquery(
+            apps.get_model('user', 'Subscribe'), 'author'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_counters'),
+        ('user', '0002_auto_20240202_1411'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
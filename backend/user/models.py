@@ -5,15 +5,18 @@ from django.core.exceptions import ValidationError
 from foodgram.constants import (
     MAX_NAME_LENGTH, MAX_EMAIL_LENGHT
 )
+from recipe.mixins import DerivedFieldsMixin
 from recipe.validators import username_validator
 
 # Если что сайт работает, но видимо что-то с виртуальной машиной,
 # потому что контейнеры запускаются работают, а потом отключаются.
 
 
-class User(AbstractUser):
+class User(DerivedFieldsMixin, AbstractUser):
     REQUIRED_FIELDS = ('username', 'password')
     USERNAME_FIELD = ('email')
+    # Счётчики ведёт recipe.counters.
+    derived_fields = ('recipes_count', 'followers_count')
 
     username = models.CharField(
         verbose_name='Имя пользователя',
@@ -34,6 +37,16 @@ class User(AbstractUser):
         verbose_name='Фамилия',
         max_length=MAX_NAME_LENGTH
     )
+    recipes_count = models.IntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.IntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -47,12 +60,14 @@ class Subscribe(models.Model):
         verbose_name='Подписчик',
         on_delete=models.CASCADE,
         related_name='follower',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE,
-        related_name='following'
+        related_name='following',
+        db_index=False,
     )
 
     class Meta:
@@ -65,6 +80,11 @@ class Subscribe(models.Model):
                 name='unique_user_author',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='subscribe_author_user',
+            ),
+        ]
 
     def clean(self):
         if self.user == self.author:
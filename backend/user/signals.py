@@ -0,0 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipe import counters
+from .models import Subscribe
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Subscribe)
+def add_follower(instance, created, **kwargs):
+    if created:
+        counters.change(User, instance.author_id, followers_count=1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def remove_follower(instance, **kwargs):
+    counters.change(User, instance.author_id, followers_count=-1)
@@ -0,0 +1,82 @@
+import base64
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.test import APIClient
+
+from recipe.models import Ingredients, Tag
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=name, slug=slug, color=color)
+        for name, slug, color in (
+            ('Завтрак', 'breakfast', '#E26C2D'),
+            ('Обед', 'lunch', '#49B64E'),
+            ('Ужин', 'dinner', '#8775D2'),
+        )
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredients.objects.create(name=f'Ингредиент {number}',
+                                   measurement_unit='г')
+        for number in range(5)
+    ]
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password='test-password', first_name='Имя', last_name='Фамилия',
+    )
+
+
+@pytest.fixture
+def author(db):
+    return make_user('author')
+
+
+@pytest.fixture
+def other_author(db):
+    return make_user('other')
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    return client_for(author)
+
+
+@pytest.fixture
+def image_data():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), '#E26C2D').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
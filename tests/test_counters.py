@@ -0,0 +1,61 @@
+import pytest
+
+from django.contrib.auth import get_user_model
+
+from recipe import counters
+from recipe.models import Favorite, Recipe
+from tests.conftest import client_for
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reconcile_fixes_drift(author, other_author):
+    recipe = Recipe.objects.create(
+        author=author, name='Рецепт', text='Описание', cooking_time=10,
+        image='recipe/image/test.png',
+    )
+    Favorite.objects.create(user=other_author, recipe=recipe)
+    Recipe.objects.filter(pk=recipe.pk).update(
+        favorites_count=5, carts_count=2,
+    )
+
+    assert counters.reconcile_recipes([recipe.pk], dry_run=True) == 1
+    assert Recipe.objects.get(pk=recipe.pk).favorites_count == 5
+    assert counters.reconcile_recipes([recipe.pk]) == 1
+
+    recipe = Recipe.objects.get(pk=recipe.pk)
+    assert (recipe.favorites_count, recipe.carts_count) == (1, 0)
+    assert counters.reconcile_recipes([recipe.pk]) == 0
+
+
+def test_full_save_keeps_counters(
+    author, other_author, tags, ingredients, image_data,
+):
+    stale_author = User.objects.get(pk=author.pk)
+    client = client_for(author)
+    recipe_id = client.post('/api/recipes/', {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': image_data,
+        'tags': [tags[0].id],
+        'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+    }, format='json').json()['id']
+    stale_recipe = Recipe.objects.get(pk=recipe_id)
+    Favorite.objects.create(user=other_author, recipe_id=recipe_id)
+    Recipe.objects.filter(pk=recipe_id).update(image_width=64)
+
+    stale_author.first_name = 'Новое имя'
+    stale_author.save()
+    stale_recipe.name = 'Новое название'
+    stale_recipe.save()
+
+    assert User.objects.get(pk=author.pk).recipes_count == 1
+    recipe = Recipe.objects.get(pk=recipe_id)
+    assert (recipe.name, recipe.favorites_count, recipe.image_width) == (
+        'Новое название', 1, 64,
+    )
+    assert client.delete(f'/api/recipes/{recipe_id}/').status_code == 204
+    assert User.objects.get(pk=author.pk).recipes_count == 0
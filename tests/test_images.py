@@ -0,0 +1,102 @@
+import base64
+import os
+import time
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from recipe import images
+from recipe.models import StoredImage
+from recipe.storage import hashed_name
+from tests.conftest import client_for
+
+pytestmark = pytest.mark.django_db
+
+
+def recipe_data(tags, ingredients, image):
+    return {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': image,
+        'tags': [tags[0].id],
+        'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+    }
+
+
+def test_delete_keeps_file_referenced_again(
+    author, tags, ingredients, image_data,
+):
+    client = client_for(author)
+    data = recipe_data(tags, ingredients, image_data)
+    first = client.post('/api/recipes/', data, format='json').json()
+    assert client.delete(f'/api/recipes/{first["id"]}/').status_code == 204
+    name = StoredImage.objects.get().name
+    assert StoredImage.objects.get().references == 0
+
+    client.post('/api/recipes/', data, format='json')
+    images.delete_files(name)
+
+    assert images.image_storage.exists(name)
+    assert StoredImage.objects.get(name=name).references == 1
+
+
+def test_save_rewrites_file_deleted_while_waiting_for_lock(
+    monkeypatch, image_data,
+):
+    content = base64.b64decode(image_data.split(',', 1)[1])
+    upload = 'recipe/image/image.png'
+    name = images.image_storage.save(upload, ContentFile(content))
+    assert name == hashed_name(upload, ContentFile(content))
+    StoredImage.objects.create(name=name)
+    exists = images.image_storage.exists
+
+    def exists_then_delete(path):
+        # Проверка до блокировки видит файл, а задание удаления
+        # успевает удалить его, пока сохранение ждёт блокировку.
+        found = exists(path)
+        if path == name and found:
+            monkeypatch.undo()
+            images.delete_files(name)
+        return found
+
+    monkeypatch.setattr(images.image_storage, 'exists', exists_then_delete)
+
+    assert images.image_storage.save(upload, ContentFile(content)) == name
+    assert images.image_storage.exists(name)
+
+
+def test_dedup_sweeps_unreferenced_files(
+    author, tags, ingredients, image_data,
+):
+    client = client_for(author)
+    recipe = client.post(
+        '/api/recipes/', recipe_data(tags, ingredients, image_data),
+        format='json',
+    ).json()
+    kept = StoredImage.objects.get().name
+    storage = images.image_storage
+    # Файлы, записанные до хранилища по хешам и брошенные загрузки.
+    old = ['recipe/image/temp.png', 'recipe/image/temp_1.png']
+    old.append(storage.save('recipe/image/image.png', ContentFile(b'old')))
+    fresh = 'recipe/image/temp_2.png'
+    for name in old[:2] + [fresh]:
+        with open(storage.path(name), 'wb') as file:
+            file.write(b'temp')
+    day_ago = time.time() - 25 * 3600
+    for name in old + [kept]:
+        os.utime(storage.path(name), (day_ago, day_ago))
+
+    out = StringIO()
+    call_command('dedup_images', '--dry-run', stdout=out)
+    assert 'без ссылок: 3' in out.getvalue()
+    assert all(storage.exists(name) for name in old)
+
+    call_command('dedup_images', stdout=StringIO())
+
+    assert not any(storage.exists(name) for name in old)
+    assert storage.exists(fresh)
+    assert storage.exists(kept)
+    assert client.get(f'/api/recipes/{recipe["id"]}/').status_code == 200
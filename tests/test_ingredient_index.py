@@ -0,0 +1,57 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.utils.ingredient_index import IngredientIndex, catalog_version
+from api.utils.versions import CATALOG, update_versions
+from recipe.models import Ingredients
+
+pytestmark = pytest.mark.django_db
+
+
+def test_search_sees_new_ingredient(
+    ingredients, django_capture_on_commit_callbacks,
+):
+    client = APIClient()
+    response = client.get('/api/ingredients/?name=ингредиент&limit=2')
+    assert [item['name'] for item in response.json()] == [
+        'Ингредиент 0', 'Ингредиент 1',
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredients.objects.create(name='Имбирь', measurement_unit='г')
+
+    response = client.get('/api/ingredients/?name=Имб')
+    assert response.json() == [{
+        'id': Ingredients.objects.get(name='Имбирь').id,
+        'name': 'Имбирь',
+        'measurement_unit': 'г',
+    }]
+
+
+def test_other_process_change_reloads_index(ingredients):
+    index = IngredientIndex(ttl=float('inf'))
+    assert index.search('имб') == []
+    # Другой процесс записал ингредиент и увеличил версию каталога;
+    # сигналы этого процесса индекс не сбрасывали.
+    Ingredients.objects.bulk_create(
+        [Ingredients(name='Имбирь', measurement_unit='г')]
+    )
+    update_versions({CATALOG})
+
+    assert [item['name'] for item in index.search('имб')] == ['Имбирь']
+
+
+def test_load_interrupted_by_invalidate_is_not_fresh(
+    ingredients, monkeypatch,
+):
+    index = IngredientIndex(ttl=float('inf'))
+    rows = Ingredients.objects.values_list
+
+    def values_list(*args, **kwargs):
+        index.invalidate()
+        return rows(*args, **kwargs)
+
+    monkeypatch.setattr(Ingredients.objects, 'values_list', values_list)
+    index.load(catalog_version())
+
+    assert not index.is_fresh(catalog_version())
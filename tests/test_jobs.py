@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+
+pytestmark = pytest.mark.django_db
+
+
+def running_job(key, minutes_ago=60, worker='dead'):
+    started = timezone.now() - timedelta(minutes=minutes_ago)
+    return Job.objects.create(
+        name='recipe.delete_image', key=key, status=Job.RUNNING,
+        max_attempts=5, worker=worker, started=started, heartbeat=started,
+    )
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    calls = []
+
+    def record(**payload):
+        calls.append(payload)
+        if payload.get('fail'):
+            raise ValueError('Ошибка обработчика')
+
+    monkeypatch.setitem(queue.HANDLERS, 'test.record', record)
+    return calls
+
+
+def test_requeue_stale_keeps_one_job_per_key():
+    first, second = running_job('image:a'), running_job('image:a')
+    keyless = running_job(None), running_job(None)
+    fresh = running_job('image:b', minutes_ago=0)
+
+    assert queue.requeue_stale(timeout=60) == 3
+
+    statuses = dict(Job.objects.values_list('id', 'status'))
+    assert statuses[first.id] == Job.QUEUED
+    assert statuses[second.id] == Job.FAILED
+    assert all(statuses[job.id] == Job.QUEUED for job in keyless)
+    assert statuses[fresh.id] == Job.RUNNING
+
+
+def test_requeue_stale_fails_job_already_queued():
+    Job.objects.create(name='recipe.delete_image', key='image:a',
+                       max_attempts=5)
+    stale = running_job('image:a')
+
+    assert queue.requeue_stale(timeout=60) == 0
+    assert Job.objects.get(id=stale.id).status == Job.FAILED
+
+
+def test_heartbeat_keeps_long_job_running():
+    long_job = running_job('image:a', worker='alive')
+    other = running_job('image:b', worker='other')
+
+    assert queue.heartbeat('alive', [long_job.id, other.id]) == 1
+    assert queue.requeue_stale(timeout=60) == 1
+
+    statuses = dict(Job.objects.values_list('id', 'status'))
+    assert statuses[long_job.id] == Job.RUNNING
+    assert statuses[other.id] == Job.QUEUED
+
+
+def test_execute_leaves_requeued_job_alone(monkeypatch):
+    def stolen(job_id, fail):
+        # Пока обработчик работал, задачу вернули в очередь и её
+        # захватил другой обработчик очереди.
+        Job.objects.filter(id=job_id).update(worker='fresh', attempts=2)
+        if fail:
+            raise ValueError('Ошибка обработчика')
+
+    monkeypatch.setitem(queue.HANDLERS, 'test.stolen', stolen)
+    for fail in (False, True):
+        job = Job.objects.create(
+            name='test.stolen', status=Job.RUNNING, worker='slow',
+            attempts=1, max_attempts=5,
+        )
+        job.payload = {'job_id': job.id, 'fail': fail}
+        job.save()
+
+        assert queue.execute(job.id, 'slow') is False
+
+        job.refresh_from_db()
+        assert (job.status, job.worker, job.error) == (
+            Job.RUNNING, 'fresh', '',
+        )
+    with pytest.raises(Job.DoesNotExist):
+        queue.execute(job.id, 'slow')
+
+
+def test_execute_marks_own_job(handlers):
+    done, failed = (
+        Job.objects.create(
+            name='test.record', payload=payload, status=Job.RUNNING,
+            worker='me', attempts=1, max_attempts=5,
+        )
+        for payload in ({}, {'fail': True})
+    )
+
+    assert queue.execute(done.id, 'me') is True
+    assert queue.execute(failed.id, 'me') is False
+
+    done.refresh_from_db()
+    failed.refresh_from_db()
+    assert done.status == Job.DONE
+    assert failed.status == Job.QUEUED
+    assert 'Ошибка обработчика' in failed.error
+    assert len(handlers) == 2
+
+
+def test_run_jobs_survives_database_error(monkeypatch):
+    Job.objects.create(name='test.record', max_attempts=5)
+    Job.objects.create(name='test.record', max_attempts=5)
+    calls = []
+
+    # Потоки пула не видят данных незафиксированной транзакции теста,
+    # поэтому execute подменён и к БД не обращается.
+    def flaky(job_id, worker):
+        calls.append(job_id)
+        if len(calls) == 1:
+            raise Job.DoesNotExist('Соединение с БД потеряно')
+        return True
+
+    monkeypatch.setattr(queue, 'execute', flaky)
+    stdout, stderr = StringIO(), StringIO()
+
+    call_command(
+        'run_jobs', '--once', '--workers=1', '--poll-interval=0',
+        stdout=stdout, stderr=stderr,
+    )
+
+    assert len(calls) == 2
+    assert 'Соединение с БД потеряно' in stderr.getvalue()
+    assert 'Выполнено задач: 1, с ошибкой: 1' in stdout.getvalue()
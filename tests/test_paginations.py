@@ -0,0 +1,117 @@
+import pytest
+from rest_framework.test import APIClient
+
+from recipe import popularity
+from recipe.models import Favorite, Recipe
+from tests.conftest import make_user
+
+pytestmark = pytest.mark.django_db
+
+TIED_RECIPES = 1300
+
+
+@pytest.fixture
+def recipes(author):
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            cooking_time=10, image='recipe/image/test.png',
+        )
+        for number in range(TIED_RECIPES)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    popularity.create(recipe_ids)
+    return recipe_ids
+
+
+def walk(client, url, link):
+    ids = []
+    while url and len(ids) <= TIED_RECIPES:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in response.json()['results'])
+        url = response.json()[link]
+    return ids
+
+
+def test_popular_cursor_pages_through_tied_scores(recipes):
+    fan = make_user('fan')
+    favorite = recipes[len(recipes) // 2]
+    Favorite.objects.create(user=fan, recipe_id=favorite)
+    client = APIClient()
+
+    forward = walk(
+        client, '/api/recipes/?ordering=popular&pagination=cursor&limit=100',
+        'next',
+    )
+
+    assert forward == [favorite] + sorted(
+        (pk for pk in recipes if pk != favorite), reverse=True,
+    )
+    last_page = client.get(
+        '/api/recipes/?ordering=popular&pagination=cursor&limit=100'
+    )
+    for _ in range(TIED_RECIPES // 100 - 1):
+        last_page = client.get(last_page.json()['next'])
+    assert last_page.json()['next'] is None
+    backward = walk(client, last_page.json()['previous'], 'previous')
+    assert sorted(backward) == sorted(forward[:-100])
+
+
+def test_id_cursor_pages_both_ways(author):
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            cooking_time=10, image='recipe/image/test.png',
+        )
+        for number in range(25)
+    )
+    client = APIClient()
+    url = '/api/recipes/?pagination=cursor&limit=10'
+
+    forward = walk(client, url, 'next')
+
+    assert forward == sorted(
+        Recipe.objects.values_list('id', flat=True), reverse=True,
+    )
+    first_page = client.get(url)
+    assert 'count' not in first_page.json()
+    second_page = client.get(first_page.json()['next'])
+    last_page = client.get(second_page.json()['next'])
+    assert last_page.json()['next'] is None
+    assert walk(client, last_page.json()['previous'], 'previous') == (
+        forward[10:20] + forward[:10]
+    )
+
+
+def test_popular_cursor_rejects_malformed_position(recipes):
+    response = APIClient().get(
+        '/api/recipes/?ordering=popular&cursor=cD14'
+    )
+    assert response.status_code == 404
+
+
+def test_search_is_paged_by_pages_only(author):
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=name, text=text, cooking_time=10,
+            image='recipe/image/test.png',
+        )
+        for name, text in (
+            ('Борщ', 'Борщ со сметаной, настоящий борщ'),
+            ('Суп', 'Почти борщ'),
+            ('Каша', 'Описание'),
+        )
+    )
+    client = APIClient()
+
+    response = client.get('/api/recipes/', {'search': 'борщ', 'limit': 1})
+    assert response.status_code == 200
+    assert [item['name'] for item in response.json()['results']] == ['Борщ']
+    response = client.get(response.json()['next'])
+    assert [item['name'] for item in response.json()['results']] == ['Суп']
+
+    for query in ({'pagination': 'cursor'}, {'cursor': 'cD0xMA=='}):
+        response = client.get('/api/recipes/', {'search': 'борщ', **query})
+        assert response.status_code == 400
+        assert 'pagination' in response.json()
@@ -0,0 +1,53 @@
+import math
+from datetime import timedelta
+
+import pytest
+
+from foodgram.constants import POPULARITY_EMPTY_SCORE, POPULARITY_EPOCH
+from recipe import popularity
+from recipe.models import Favorite, Recipe, RecipePopularity, ShoppingCart
+from tests.conftest import make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipe(author):
+    return Recipe.objects.create(
+        author=author, name='Рецепт', text='Описание', cooking_time=10,
+        image='recipe/image/test.png',
+    )
+
+
+def score(recipe):
+    return RecipePopularity.objects.get(recipe=recipe).score
+
+
+def test_incremental_score_matches_recompute(recipe):
+    users = [make_user(f'user{number}') for number in range(3)]
+    Favorite.objects.create(user=users[0], recipe=recipe)
+    ShoppingCart.objects.create(user=users[1], recipe=recipe)
+    Favorite.objects.create(user=users[2], recipe=recipe)
+    Favorite.objects.filter(user=users[0]).delete()
+    incremental = score(recipe)
+
+    popularity.recompute([recipe.id])
+
+    assert incremental == pytest.approx(score(recipe))
+    ShoppingCart.objects.all().delete()
+    Favorite.objects.all().delete()
+    assert score(recipe) == POPULARITY_EMPTY_SCORE
+
+
+def test_weight_does_not_overflow_far_from_epoch(settings):
+    settings.POPULARITY_HALF_LIFE_DAYS = 1
+    created = POPULARITY_EPOCH + timedelta(days=5000)
+
+    value = popularity.log_weight(Favorite, created)
+
+    assert value == pytest.approx(5000)
+    assert popularity.log_add(value, value) == pytest.approx(5001)
+    assert popularity.log_subtract(
+        popularity.log_add(value, value - 1), value - 1,
+    ) == pytest.approx(value)
+    assert math.isfinite(popularity.log_sum([value, value + 2000]))
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from api.utils.recipe_import import RecipeImporter
+from api.utils.versions import recipe_key
+from recipe.models import DataVersion, Recipe, RecipePopularity, StoredImage
+from tests.conftest import client_for
+
+User = get_user_model()
+
+pytestmark = pytest.mark.django_db
+
+RECIPES = 3
+
+
+def recipe_rows(image, tags, ingredients):
+    return [
+        {
+            'name': f'Рецепт {number}',
+            'text': 'Описание',
+            'cooking_time': 10 + number,
+            'image': image,
+            'tags': [tag.id for tag in tags[:number + 1]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10 * (number + 1)}
+                for ingredient in ingredients[number:number + 2]
+            ],
+        }
+        for number in range(RECIPES)
+    ]
+
+
+def snapshot(user):
+    """Всё, что при создании рецептов меняют сигналы, по автору."""
+    user = User.objects.get(id=user.id)
+    recipes = Recipe.objects.filter(author=user).order_by('name')
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    return {
+        'recipes_count': user.recipes_count,
+        'recipes': [
+            (
+                recipe.name,
+                recipe.tags_mask,
+                sorted(recipe.tags.values_list('slug', flat=True)),
+                sorted(recipe.recipe_ingredients.values_list(
+                    'ingredient__name', 'amount',
+                )),
+            )
+            for recipe in recipes
+        ],
+        'popularity': RecipePopularity.objects.filter(
+            recipe_id__in=recipe_ids
+        ).count(),
+        'versions': DataVersion.objects.filter(
+            key__in=[recipe_key(pk) for pk in recipe_ids]
+        ).count(),
+        'images': sorted(set(recipes.values_list('image', flat=True))),
+    }
+
+
+def test_import_matches_api_create(
+    author, other_author, tags, ingredients, image_data,
+):
+    rows = recipe_rows(image_data, tags, ingredients)
+    client = client_for(author)
+    for row in rows:
+        response = client.post('/api/recipes/', row, format='json')
+        assert response.status_code == 201, response.content
+
+    report = RecipeImporter(other_author).run(
+        json.dumps(row) for row in rows
+    )
+
+    assert report == {'created': RECIPES, 'errors': []}
+    created, imported = snapshot(author), snapshot(other_author)
+    assert imported == created
+    assert created['recipes_count'] == RECIPES
+    assert created['popularity'] == created['versions'] == RECIPES
+    image, = created['images']
+    assert StoredImage.objects.get(name=image).references == 2 * RECIPES
+
+
+def test_import_rejects_foreign_author_for_regular_user(
+    author, other_author, tags, ingredients, image_data,
+):
+    row = recipe_rows(image_data, tags, ingredients)[0]
+    body = '\n'.join(
+        json.dumps(dict(row, author=email))
+        for email in (other_author.email, author.email)
+    )
+
+    response = client_for(author).post(
+        '/api/recipes/import/', body, content_type='application/x-ndjson',
+    )
+
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+    assert [error['line'] for error in response.json()['errors']] == [1]
+    assert not Recipe.objects.filter(author=other_author).exists()
+
+
+@pytest.mark.parametrize('change', (
+    {'ingredients': [5]},
+    {'ingredients': 5},
+    {'image': '../foodgram/settings.py'},
+    {'image': 'recipe/image/derivatives/image/160.png'},
+))
+def test_import_reports_bad_rows(
+    author, tags, ingredients, image_data, media_root, change,
+):
+    row = dict(recipe_rows(image_data, tags, ingredients)[0], **change)
+
+    report = RecipeImporter(author).run([json.dumps(row)])
+
+    assert report['created'] == 0
+    assert len(report['errors']) == 1
+    assert not any(path.is_file() for path in media_root.rglob('*'))
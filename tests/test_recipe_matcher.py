@@ -0,0 +1,88 @@
+import pytest
+
+from api.utils.recipe_matcher import RecipeMatcher, recipe_matcher
+from api.utils.versions import recipe_key, update_versions
+from recipe.models import Recipe, RecipeIngredient
+from tests.conftest import client_for
+
+pytestmark = pytest.mark.django_db
+
+
+def create_recipe(author, ingredients):
+    recipe = Recipe.objects.create(
+        author=author, name='Рецепт', text='Описание', cooking_time=10,
+        image='recipe/image/test.png',
+    )
+    set_ingredients(recipe, ingredients)
+    return recipe
+
+
+def set_ingredients(recipe, ingredients):
+    RecipeIngredient.objects.filter(recipe=recipe).delete()
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+        for ingredient in ingredients
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_matcher():
+    recipe_matcher.invalidate()
+    yield
+    recipe_matcher.invalidate()
+
+
+def test_match_orders_by_coverage(author, ingredients):
+    first, second, third, _ = ingredients[:4]
+    both = create_recipe(author, [first, second])
+    most = create_recipe(author, [first, second, third])
+    single = create_recipe(author, [first])
+    half = create_recipe(author, [first, third])
+    create_recipe(author, [ingredients[3], ingredients[4]])
+    client = client_for(author)
+
+    response = client.get(
+        f'/api/recipes/match/?ingredients={first.id}'
+        f'&ingredients={second.id}'
+    )
+
+    assert response.status_code == 200
+    assert [
+        (item['id'], item['matched'], item['missing'])
+        for item in response.json()
+    ] == [
+        (single.id, 1, 0), (both.id, 2, 0), (most.id, 2, 1), (half.id, 1, 1),
+    ]
+    response = client.get(
+        f'/api/recipes/match/?ingredients={first.id}&limit=2'
+    )
+    assert [item['id'] for item in response.json()] == [single.id, half.id]
+
+
+def test_match_validates_query(author):
+    client = client_for(author)
+
+    assert client.get('/api/recipes/match/').status_code == 400
+    assert client.get('/api/recipes/match/?ingredients=x').status_code == 400
+    response = client.get('/api/recipes/match/?ingredients=1&limit=0')
+    assert response.status_code == 400
+
+
+def test_sync_sees_changes_from_other_process(author, ingredients):
+    matcher = RecipeMatcher(ttl=3600, sync_interval=0)
+    changed = create_recipe(author, [ingredients[0]])
+    removed = create_recipe(author, [ingredients[0], ingredients[1]])
+    matcher.load()
+    assert {pk for pk, _, _ in matcher.match([ingredients[0].id], 10)} == {
+        changed.id, removed.id,
+    }
+
+    # Другой процесс меняет состав рецептов и версии; в этом процессе
+    # о них не знают ни mark(), ни сигналы.
+    set_ingredients(changed, [ingredients[1]])
+    set_ingredients(removed, [])
+    added = create_recipe(author, [ingredients[0], ingredients[2]])
+    update_versions({recipe_key(changed.id), recipe_key(removed.id)})
+
+    assert matcher.match([ingredients[0].id], 10) == [(added.id, 1, 1)]
+    assert matcher.match([ingredients[1].id], 10) == [(changed.id, 1, 0)]
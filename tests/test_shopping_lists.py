@@ -0,0 +1,118 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipe import shopping_lists
+from recipe.models import Recipe, ShoppingCart, ShoppingListItem
+from tests.conftest import client_for, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+def create_recipe(client, tags, amounts, image_data):
+    response = client.post('/api/recipes/', {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': image_data,
+        'tags': [tags[0].id],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': amount}
+            for ingredient, amount in amounts
+        ],
+    }, format='json')
+    assert response.status_code == 201, response.content
+    return response.json()['id']
+
+
+def stored_lists():
+    return {
+        user_id: dict(
+            ShoppingListItem.objects.filter(user_id=user_id)
+            .values_list('ingredient_id', 'amount')
+        )
+        for user_id in ShoppingListItem.objects.values_list(
+            'user_id', flat=True
+        ).distinct()
+    }
+
+
+def assert_matches_carts():
+    user_ids = list(ShoppingCart.objects.values_list('user_id', flat=True))
+    user_ids += ShoppingListItem.objects.values_list('user_id', flat=True)
+    expected = shopping_lists.calculate(set(user_ids))
+    assert stored_lists() == {
+        user_id: amounts for user_id, amounts in expected.items() if amounts
+    }
+
+
+def test_shopping_lists_follow_carts_and_recipes(
+    author, other_author, tags, ingredients, image_data,
+):
+    author_client = client_for(author)
+    other_client = client_for(other_author)
+    buyer = make_user('buyer')
+    buyer_client = client_for(buyer)
+    first = create_recipe(author_client, tags, [
+        (ingredients[0], 10), (ingredients[1], 5),
+    ], image_data)
+    second = create_recipe(other_client, tags, [
+        (ingredients[1], 7), (ingredients[2], 3),
+    ], image_data)
+
+    for client in (author_client, other_client, buyer_client):
+        for recipe_id in (first, second):
+            response = client.post(f'/api/recipes/{recipe_id}/shopping_cart/')
+            assert response.status_code == 201, response.content
+    assert_matches_carts()
+    assert stored_lists()[buyer.id] == {
+        ingredients[0].id: 10, ingredients[1].id: 12, ingredients[2].id: 3,
+    }
+
+    response = author_client.patch(f'/api/recipes/{first}/', {
+        'tags': [tags[0].id],
+        'ingredients': [
+            {'id': ingredients[1].id, 'amount': 1},
+            {'id': ingredients[3].id, 'amount': 4},
+        ],
+    }, format='json')
+    assert response.status_code == 200, response.content
+    assert_matches_carts()
+
+    response = buyer_client.delete(f'/api/recipes/{second}/shopping_cart/')
+    assert response.status_code == 204
+    assert_matches_carts()
+
+    assert author_client.delete(f'/api/recipes/{first}/').status_code == 204
+    assert_matches_carts()
+    assert buyer.id not in stored_lists()
+
+    other_author.delete()
+    assert_matches_carts()
+    assert stored_lists() == {}
+    assert shopping_lists.rebuild([author.id, buyer.id], dry_run=True) == 0
+
+
+def test_recipe_delete_updates_shopping_lists_in_bulk(
+    author, tags, ingredients, image_data,
+):
+    recipe_id = create_recipe(client_for(author), tags, [
+        (ingredients[0], 10), (ingredients[1], 5),
+    ], image_data)
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=make_user(f'buyer{number}'), recipe_id=recipe_id)
+        for number in range(20)
+    )
+    shopping_lists.rebuild(
+        list(ShoppingCart.objects.values_list('user_id', flat=True)),
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        Recipe.objects.get(pk=recipe_id).delete()
+
+    updates = [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('UPDATE "recipes_shopping_list_item"')
+    ]
+    assert len(updates) == 1
+    assert not ShoppingListItem.objects.exists()
@@ -0,0 +1,125 @@
+import pytest
+
+from foodgram.constants import TAG_MASK_IN_BITS
+from recipe import tag_masks
+from recipe.models import Recipe, Tag
+from tests.conftest import client_for
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipes(author, tags, ingredients, image_data):
+    client = client_for(author)
+    created = []
+    for tag_sets in ((0,), (1,), (0, 2)):
+        response = client.post('/api/recipes/', {
+            'name': f'Рецепт {tag_sets}',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': image_data,
+            'tags': [tags[index].id for index in tag_sets],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+        }, format='json')
+        assert response.status_code == 201, response.content
+        created.append(Recipe.objects.get(id=response.json()['id']))
+    return created
+
+
+def expected_masks():
+    masks = dict.fromkeys(Recipe.objects.values_list('id', flat=True), 0)
+    for recipe_id, bit in Recipe.tags.through.objects.values_list(
+        'recipe_id', 'tag__bit'
+    ):
+        masks[recipe_id] |= 1 << bit
+    return masks
+
+
+def stored_masks():
+    return dict(Recipe.objects.values_list('id', 'tags_mask'))
+
+
+def test_masks_follow_tag_changes(recipes, tags, author, ingredients):
+    first, second, third = recipes
+    response = client_for(author).patch(
+        f'/api/recipes/{first.id}/',
+        {
+            'tags': [tags[1].id, tags[2].id],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+        },
+        format='json',
+    )
+    assert response.status_code == 200, response.content
+    assert stored_masks() == expected_masks()
+
+    second.tags.add(tags[2])
+    third.tags.remove(tags[0])
+    assert stored_masks() == expected_masks()
+
+    tags[2].recipes.remove(first)
+    tags[1].recipes.add(third)
+    tags[1].recipes.clear()
+    assert stored_masks() == expected_masks()
+
+    second.tags.clear()
+    tags[2].delete()
+    assert stored_masks() == expected_masks()
+
+
+def test_filter_sees_tag_created_in_other_process(recipes, tags, author):
+    tag_masks.tag_bits.load()
+    first, _, third = recipes
+    # Тег, созданный другим процессом: сигналы этого процесса о нём
+    # не знают, и кэш битов не сброшен.
+    Tag.objects.bulk_create([Tag(
+        name='Десерт', slug='dessert', color='#FFFFFF', bit=10,
+    )])
+    Recipe.tags.through.objects.create(
+        recipe=first, tag=Tag.objects.get(slug='dessert'),
+    )
+    tag_masks.rebuild([first.id])
+    client = client_for(author)
+
+    response = client.get('/api/recipes/?tags=dessert')
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [first.id]
+
+    # Незнакомый slug перечитал кэш, и маска с новым битом уже в нём.
+    response = client.get(f'/api/recipes/?tags={tags[0].slug}')
+    assert response.status_code == 200
+    assert {item['id'] for item in response.json()['results']} == {
+        first.id, third.id,
+    }
+
+    response = client.get('/api/recipes/?tags=unknown')
+    assert response.status_code == 400
+
+
+def test_filter_with_many_tags_uses_tag_links(recipes, tags):
+    extra = [
+        Tag.objects.create(
+            name=f'Тег {number}', slug=f'tag{number}',
+            color=f'#0000{number:02X}',
+        )
+        for number in range(TAG_MASK_IN_BITS)
+    ]
+    first, second, third = recipes
+    second.tags.add(extra[-1])
+    queryset = tag_masks.filter_any(
+        Recipe.objects.all(),
+        tag_masks.tag_bits.mask([tags[2].slug, extra[-1].slug]),
+    )
+
+    assert 'tags_mask' not in str(queryset.query).split('WHERE', 1)[1]
+    assert set(queryset) == {second, third}
+
+
+def test_full_save_keeps_tags_mask(recipes, tags):
+    first = recipes[0]
+    stale = Recipe.objects.get(pk=first.pk)
+    first.tags.add(tags[1])
+
+    stale.name = 'Новое название'
+    stale.save()
+
+    assert stored_masks() == expected_masks()
@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from recipe.models import Recipe
+from recipe.storage import hashed_name
+from tests.conftest import client_for
+
+pytestmark = pytest.mark.django_db
+
+
+def png(width=64, height=48):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), '#49B64E').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def post_recipe(author, tags, ingredients, content):
+    image = io.BytesIO(content)
+    image.name = 'photo.png'
+    return client_for(author).post('/api/recipes/', {
+        'name': 'Рецепт',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': image,
+        'tags': [tags[0].id, tags[1].id],
+        'ingredients': json.dumps([{'id': ingredients[0].id, 'amount': 10}]),
+    }, format='multipart')
+
+
+def test_multipart_upload_creates_recipe(author, tags, ingredients):
+    content = png()
+
+    response = post_recipe(author, tags, ingredients, content)
+
+    assert response.status_code == 201, response.content
+    recipe = Recipe.objects.get(id=response.json()['id'])
+    assert recipe.image.name == hashed_name(
+        'recipe/image/photo.png', ContentFile(content),
+    )
+    assert recipe.image.read() == content
+    assert set(recipe.tags.values_list('id', flat=True)) == {
+        tags[0].id, tags[1].id,
+    }
+    assert recipe.recipe_ingredients.get().amount == 10
+
+
+@pytest.mark.parametrize('name, value, message', [
+    ('IMAGE_MAX_UPLOAD_SIZE', 100, 'Размер изображения превышает 100 байт'),
+    ('IMAGE_MAX_DIMENSION', 32, 'Сторона изображения превышает 32 px'),
+])
+def test_multipart_upload_rejects_large_image(
+    settings, author, tags, ingredients, name, value, message,
+):
+    setattr(settings, name, value)
+
+    response = post_recipe(author, tags, ingredients, png())
+
+    assert response.status_code == 400
+    assert message in response.json()['detail']
+    assert not Recipe.objects.exists()
@@ -0,0 +1,45 @@
+import pytest
+
+from api.utils.versions import (
+    POPULARITY, RECIPES, bump_versions, get_versions, recipe_key,
+)
+from recipe.models import Recipe
+
+pytestmark = pytest.mark.django_db
+
+
+def recipe_versions(recipes):
+    keys = [recipe_key(recipe.id) for recipe in recipes]
+    versions = get_versions(keys)
+    return [versions.get(key, (0,))[0] for key in keys]
+
+
+def test_reverse_tag_clear_bumps_recipe_versions(author, tags):
+    recipes = [
+        Recipe.objects.create(
+            author=author, name=f'Рецепт {number}', text='Описание',
+            cooking_time=10, image='recipe/image/test.png',
+        )
+        for number in range(2)
+    ]
+    tags[0].recipes.add(*recipes)
+    before = recipe_versions(recipes)
+
+    tags[0].recipes.clear()
+
+    assert [
+        version - 1 for version in recipe_versions(recipes)
+    ] == before
+
+
+def test_collection_versions_bump_once_per_transaction(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        for recipe_id in range(1, 4):
+            bump_versions((recipe_key(recipe_id), RECIPES, POPULARITY))
+        assert not get_versions((RECIPES, POPULARITY))
+        assert get_versions((recipe_key(1),))[recipe_key(1)][0] == 1
+
+    versions = get_versions((RECIPES, POPULARITY))
+    assert versions[RECIPES][0] == versions[POPULARITY][0] == 1
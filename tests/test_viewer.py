@@ -0,0 +1,89 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.utils.viewer import Viewer
+from recipe.models import Favorite, Recipe, ShoppingCart
+from tests.conftest import client_for, make_user
+from user.models import Subscribe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def recipes(author, other_author):
+    return [
+        Recipe.objects.create(
+            author=recipe_author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipe/image/test.png',
+        )
+        for recipe_author in (author, other_author, other_author)
+    ]
+
+
+@pytest.fixture
+def reader(recipes, other_author):
+    reader = make_user('reader')
+    Favorite.objects.create(user=reader, recipe=recipes[0])
+    ShoppingCart.objects.create(user=reader, recipe=recipes[1])
+    Subscribe.objects.create(user=reader, author=other_author)
+    return reader
+
+
+def union_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if 'UNION ALL' in query['sql']
+    ]
+
+
+def test_list_loads_viewer_sets_with_one_union(reader, recipes):
+    with CaptureQueriesContext(connection) as queries:
+        response = client_for(reader).get('/api/recipes/')
+
+    assert response.status_code == 200
+    flags = {
+        item['id']: (
+            item['is_favorited'], item['is_in_shopping_cart'],
+            item['author']['is_subscribed'],
+        )
+        for item in response.json()['results']
+    }
+    assert flags == {
+        recipes[0].id: (True, False, False),
+        recipes[1].id: (False, True, True),
+        recipes[2].id: (False, False, True),
+    }
+    assert len(union_queries(queries)) == 1
+
+
+def test_anonymous_list_skips_viewer_query(reader):
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().get('/api/recipes/')
+
+    assert response.status_code == 200
+    assert not any(
+        item['is_favorited'] or item['author']['is_subscribed']
+        for item in response.json()['results']
+    )
+    assert not union_queries(queries)
+
+
+def test_viewer_loads_each_object_once(
+    reader, recipes, other_author, django_assert_num_queries,
+):
+    viewer = Viewer(reader)
+    with django_assert_num_queries(1):
+        viewer.load(
+            recipe_ids=[recipe.id for recipe in recipes],
+            author_ids=[other_author.id],
+        )
+    with django_assert_num_queries(0):
+        assert viewer.has_recipe(Favorite, recipes[0].id)
+        assert not viewer.has_recipe(ShoppingCart, recipes[2].id)
+        assert viewer.is_subscribed(other_author.id)
+        assert not Viewer(AnonymousUser()).has_recipe(
+            Favorite, recipes[0].id,
+        )